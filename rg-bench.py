@@ -0,0 +1,69 @@
+"""Checks move generation and times the engine and the strategies"""
+
+import re
+import time
+
+from rg_bench import (
+    CARRIED_GAMES,
+    CORPUS_SIZE,
+    ORDER_GAMES,
+    PERFT_COUNTS,
+    RESUME_GAMES,
+    build_corpus,
+    carried_moves,
+    order_dependent,
+    resume_matches,
+    run_benchmarks,
+    run_perft,
+)
+
+
+if __name__ == "__main__":
+    print("R E V E R S E G A M : BENCHMARK")
+    print()
+    time.sleep(2)
+
+    depth = ""
+    while re.match("^([1-9]|10)$", depth) is None:
+        print("How deep should perft count from the starting board? (1~10)")
+        depth = input()
+
+    print()
+    print("depth       leaves   seconds    nodes/s")
+    for current_depth, nodes, seconds in run_perft(int(depth)):
+        status = "ok" if nodes == PERFT_COUNTS[current_depth] else "MISMATCH"
+        print(
+            f"{current_depth:>5} {nodes:>12} {seconds:>9.3f} "
+            f"{nodes / max(seconds, 1e-9):>10.0f}  {status}"
+        )
+
+    print()
+    carried, scanned = carried_moves()
+    print(
+        f"Legal moves carried over {carried} times and scanned {scanned} times "
+        f"in {CARRIED_GAMES} random games"
+    )
+
+    print()
+    print(f"Playing {ORDER_GAMES} games per strategy alone and after each other...")
+    dependent = order_dependent()
+    if dependent:
+        print(f"Games depend on the games played before them: {' '.join(dependent)}")
+    else:
+        print("Every game only depends on its seed")
+
+    print()
+    print(f"Stopping and resuming a run of {RESUME_GAMES} games...")
+    if resume_matches():
+        print("The resumed run matches the run played in one go")
+    else:
+        print("The resumed run differs from the run played in one go")
+
+    print()
+    print(f"Timing on {CORPUS_SIZE} positions from seeded random games")
+    print("benchmark                          calls   seconds   us/call")
+    for name, calls, seconds in run_benchmarks(build_corpus()):
+        print(
+            f"{name:<31} {calls:>8} {seconds:>9.3f} "
+            f"{1e6 * seconds / max(calls, 1):>9.1f}"
+        )
@@ -0,0 +1,45 @@
+"""Builds the opening book from self-play games"""
+
+import re
+import time
+import random
+
+from rg_book import BOOK_PATH, OPENING_PLIES, build_book
+from rg_runner import game_seeds, play_full_game
+from rg_strategies import STRATEGIES, strategy_menu
+
+
+if __name__ == "__main__":
+    print("R E V E R S E G A M : OPENING BOOK")
+    print()
+    time.sleep(2)
+
+    print()
+    print(strategy_menu())
+    print()
+
+    ai = ""
+    while ai not in STRATEGIES:
+        print(f"Choose the algorithm that plays both sides: (1~{len(STRATEGIES)})")
+        ai = input()
+    games = ""
+    while re.match("^[0-9]+$", games) is None:
+        print("How many self-play games should the book be built from?")
+        games = input()
+
+    seed = random.randrange(2**32)
+    print(f"Seed: {seed}")
+    print(f"Playing from {OPENING_PLIES} random opening moves...")
+
+    started = time.perf_counter()
+    positions = build_book(
+        BOOK_PATH,
+        (
+            play_full_game(ai, ai, game_seed, opening_plies=OPENING_PLIES)
+            for game_seed in game_seeds(seed, int(games))
+        ),
+    )
+    print(
+        f"Wrote {positions} positions to {BOOK_PATH} "
+        f"in {time.perf_counter() - started:.1f} seconds."
+    )
@@ -0,0 +1,58 @@
+"""Makes self-play training data from the AI algorithms"""
+
+import re
+import time
+
+from rg_selfplay import OPENING_PLIES, SHARD_SAMPLES, run_selfplay
+from rg_strategies import STRATEGIES, strategy_menu
+
+
+if __name__ == "__main__":
+    print("R E V E R S E G A M : SELF-PLAY DATA")
+    print()
+    time.sleep(2)
+
+    print(strategy_menu())
+    print()
+
+    strategies = None
+    while strategies is None:
+        print("Which algorithms play? (eg. 358)")
+        strategies = list(dict.fromkeys(input().strip()))
+        if not strategies or not set(strategies) <= set(STRATEGIES):
+            strategies = None
+
+    shards = ""
+    while re.match("^[1-9][0-9]*$", shards) is None:
+        print(f"How many shards of {SHARD_SAMPLES} positions should be made?")
+        shards = input()
+
+    directory = ""
+    while not directory:
+        print("Which directory should the shards go to?")
+        directory = input().strip()
+
+    seed = ""
+    while re.match("^[0-9]+$", seed) is None:
+        print("Seed of the first game?")
+        seed = input()
+
+    print()
+    print(f"Playing from {OPENING_PLIES} random opening moves...")
+    started = time.perf_counter()
+
+    def report(shard: dict) -> None:
+        """prints a finished shard"""
+
+        elapsed = time.perf_counter() - started
+        print(
+            f"{shard['file']}: {shard['samples']} positions from "
+            f"{shard['games']} games ({elapsed:.0f}s)"
+        )
+
+    manifest = run_selfplay(
+        directory, strategies, int(shards), int(seed), progress=report
+    )
+    samples = sum(shard["samples"] for shard in manifest["shards"])
+    print()
+    print(f"{directory} holds {samples} positions in {len(manifest['shards'])} shards.")
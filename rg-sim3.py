@@ -3,368 +3,247 @@
 import re
 import time
 import random
-from copy import deepcopy
-from textwrap import dedent
-
-NEW_BOARD = [list(" " * 8) for _ in range(8)]
-COLUMNS = "abcdefgh"
-
-
-def get_scores(
-    player_mark: str, opponent_mark: str, board: list[list[str]]
-) -> tuple[int, int]:
-    """returns scores"""
-
-    flattened_board = [item for row in board for item in row]
-    player_scores = flattened_board.count(player_mark)
-    opponent_scores = flattened_board.count(opponent_mark)
-
-    return (player_scores, opponent_scores)
-
-
-def check_direction(
-    direction: str, coordinates: list[int], board: list[list[str]]
-) -> tuple[list[int], str]:
-    """returns coordinates of checked direction from selected position and the mark in the space"""
-
-    row = coordinates[0]
-    column = coordinates[1]
-
-    if direction == "up":
-        new_row = row - 1
-        new_column = column
-        new_mark = board[new_row][new_column]
-    elif direction == "down":
-        new_row = row + 1
-        new_column = column
-        new_mark = board[new_row][new_column]
-    elif direction == "left":
-        new_row = row
-        new_column = column - 1
-        new_mark = board[new_row][new_column]
-    elif direction == "right":
-        new_row = row
-        new_column = column + 1
-        new_mark = board[new_row][new_column]
-    elif direction == "diagonal0":
-        new_row = row - 1
-        new_column = column + 1
-        new_mark = board[new_row][new_column]
-    elif direction == "diagonal1":
-        new_row = row + 1
-        new_column = column + 1
-        new_mark = board[new_row][new_column]
-    elif direction == "diagonal2":
-        new_row = row + 1
-        new_column = column - 1
-        new_mark = board[new_row][new_column]
-    elif direction == "diagonal3":
-        new_row = row - 1
-        new_column = column - 1
-        new_mark = board[new_row][new_column]
-    else:
-        raise Exception
+from contextlib import ExitStack
 
-    return ([new_row, new_column], new_mark)
+from rg_arena import Pairing, elo_difference, run_tournament
+from rg_checkpoint import Checkpoint
+from rg_cli import build_parser, run_headless
+from rg_profile import MoveProfiler
+from rg_records import RecordWriter
+from rg_runner import run_simulation
+from rg_strategies import STRATEGIES, strategy_menu
 
 
-def not_within_the_board(row: int, column: int, direction: str) -> bool:
-    """checks for movement outside the board"""
+def report(pairing: Pairing) -> None:
+    """prints the result of a finished tournament pairing"""
 
-    if (
-        (row == 0 and direction in ["up", "diagonal0", "diagonal3"])
-        or (column == 0 and direction in ["left", "diagonal2", "diagonal3"])
-        or (row == 7 and direction in ["down", "diagonal1", "diagonal2"])
-        or (column == 7 and direction in ["right", "diagonal0", "diagonal1"])
-    ):
-        return True
-    else:
-        return False
-
-
-def valid_move(player_mark: str, coordinates: str, board: list[list[str]]):
-    """confirms whether selected position is a valid move and flips necessary tiles"""
-
-    if len(coordinates) == 2:
-        column = COLUMNS.index(coordinates[0])
-        row = int(coordinates[1]) - 1
-
-        if board[row][column] == " ":
-            opponent_mark = "X" if player_mark == "O" else "O"
-            directions = [
-                "up",
-                "down",
-                "left",
-                "right",
-                "diagonal0",
-                "diagonal1",
-                "diagonal2",
-                "diagonal3",
-            ]
-
-            found_valid_move = False
-            # starting from selected position check all directions for opponent's mark
-            for direction in directions:
-                # move within the board
-                if not_within_the_board(row, column, direction):
-                    continue
-                new_coordinates, new_mark = check_direction(
-                    direction, [row, column], board
-                )
+    winner = pairing.decision()
+    verdict = f"{winner} is stronger" if winner else "undecided"
+    print(
+        f"{pairing.first} vs {pairing.second}: +{pairing.wins} "
+        f"={pairing.ties} -{pairing.losses} in {pairing.games} games, "
+        f"{elo_difference(pairing.score()):+.0f} elo, {verdict}"
+    )
 
-                may_be_flipped = []
-                # if opponent's mark is found go further looking for player's mark
-                while new_mark == opponent_mark:
-                    # save each opponent's mark coordinates
-                    may_be_flipped.append(new_coordinates)
-                    # move within the board
-                    if not_within_the_board(
-                        new_coordinates[0], new_coordinates[1], direction
-                    ):
-                        break
-                    new_coordinates, new_mark = check_direction(
-                        direction, [new_coordinates[0], new_coordinates[1]], board
-                    )
-
-                    if new_mark == player_mark:
-                        # if player's mark is found flip all opponent marks between it
-                        # and the selected position
-                        for x, y in may_be_flipped:
-                            board[x][y] = player_mark
-
-                        found_valid_move = True
-
-            if found_valid_move:
-                board[row][column] = player_mark
-                return True
-
-    return False
-
-
-def get_allowed_moves(player_mark: str, board: list[list[str]]) -> list[str]:
-    """returns list of coordinates that are allowed moves for the player"""
-
-    allowed_moves = []
-
-    for row in range(1, 9):
-        for column in COLUMNS:
-            coordinates = column + str(row)
-            # copy of the playing board for simulation
-            dummy_board = deepcopy(board)
-            # board only gets changed if it's a valid move
-            if valid_move(player_mark, coordinates, dummy_board):
-                allowed_moves.append(coordinates)
-
-    return allowed_moves
-
-
-def corner_first_computer(
-    player_mark: str, allowed_moves: list[str], board: list[list[str]]
-):
-    """applies corner moves otherwise retrieves coordinates with highest score
-    and plays with it"""
-
-    opponent_mark = "X" if player_mark == "O" else "O"
-    corners = ["a1", "h1", "a8", "h8"]
-
-    for corner in corners:
-        if corner in allowed_moves:
-            # play with the corner on the playing board
-            valid_move(player_mark, corner, board)
-            break
-    else:
-        # if none of the corners are in allowed_moves use the best score
-        scores = {}
-        for coordinates in allowed_moves:
-            # copy of the playing board for simulation
-            dummy_board = deepcopy(board)
-            # play with the valid move on the simulation board
-            valid_move(player_mark, coordinates, dummy_board)
-            # get the score of the move and store them
-            scores[coordinates] = get_scores(player_mark, opponent_mark, dummy_board)[0]
-
-        # get coordinate with max score
-        coordinate_max = max(scores, key=lambda x: scores[x], default="")
-        # play with the max score on the playing board
-        valid_move(player_mark, coordinate_max, board)
-
-
-def side_first_computer(
-    player_mark: str, allowed_moves: list[str], board: list[list[str]]
-):
-    """applies side moves otherwise retrieves coordinates with highest score
-    and plays with it"""
-
-    opponent_mark = "X" if player_mark == "O" else "O"
-
-    for coordinate in allowed_moves:
-        # side coordinate has to have "a" or "1" or "h" or "7"
-        if any(side_indicator in coordinate for side_indicator in ["a", "1", "h", "7"]):
-            # play with the corner on the playing board
-            valid_move(player_mark, coordinate, board)
-            break
-    else:
-        # if none of the corners are in allowed_moves use the best score
-        scores = {}
-        for coordinates in allowed_moves:
-            # copy of the playing board for simulation
-            dummy_board = deepcopy(board)
-            # play with the valid move on the simulation board
-            valid_move(player_mark, coordinates, dummy_board)
-            # get the score of the move and store them
-            scores[coordinates] = get_scores(player_mark, opponent_mark, dummy_board)[0]
-
-        # get coordinate with max score
-        coordinate_max = max(scores, key=lambda x: scores[x], default="")
-        # play with the max score on the playing board
-        valid_move(player_mark, coordinate_max, board)
-
-
-def best_scoring_computer(
-    player_mark: str, allowed_moves: list[str], board: list[list[str]]
-):
-    """retrieves coordinates with highest score and plays with it"""
-
-    opponent_mark = "X" if player_mark == "O" else "O"
-
-    scores = {}
-    for coordinates in allowed_moves:
-        # copy of the playing board for simulation
-        dummy_board = deepcopy(board)
-        # play with the valid move on the simulation board
-        valid_move(player_mark, coordinates, dummy_board)
-        # get the score of the move and store them
-        scores[coordinates] = get_scores(player_mark, opponent_mark, dummy_board)[0]
-
-    # get coordinate with max score
-    coordinate_max = max(scores, key=lambda x: scores[x], default="")
-    # play with the max score on the playing board
-    valid_move(player_mark, coordinate_max, board)
-
-
-def worst_scoring_computer(
-    player_mark: str, allowed_moves: list[str], board: list[list[str]]
-):
-    """retrieves coordinates with lowest score and plays with it"""
-
-    opponent_mark = "X" if player_mark == "O" else "O"
-
-    scores = {}
-    for coordinates in allowed_moves:
-        # copy of the playing board for simulation
-        dummy_board = deepcopy(board)
-        # play with the valid move on the simulation board
-        valid_move(player_mark, coordinates, dummy_board)
-        # get the score of the move and store them
-        scores[coordinates] = get_scores(player_mark, opponent_mark, dummy_board)[0]
-
-    # get coordinate with min score
-    coordinate_min = min(scores, key=lambda x: scores[x], default="")
-    # play with the min score on the playing board
-    valid_move(player_mark, coordinate_min, board)
-
-
-def random_move_computer(
-    player_mark: str, allowed_moves: list[str], board: list[list[str]]
-):
-    """retrieves random coordinate and plays with it"""
-
-    random_coordinate = random.choice(allowed_moves)
-    # play with the min score on the playing board
-    valid_move(player_mark, random_coordinate, board)
-
-
-def chosen_algorithm(
-    identifier: str, player_mark: str, allowed_moves: list[str], board: list[list[str]]
-):
-    match identifier:
-        case "1":
-            corner_first_computer(player_mark, allowed_moves, board)
-        case "2":
-            side_first_computer(player_mark, allowed_moves, board)
-        case "3":
-            best_scoring_computer(player_mark, allowed_moves, board)
-        case "4":
-            worst_scoring_computer(player_mark, allowed_moves, board)
-        case "5":
-            random_move_computer(player_mark, allowed_moves, board)
 
+def play_tournament(
+    entrants: list[str], seed: int, max_games: int, checkpoint: Checkpoint | None
+) -> None:
+    """plays the tournament and prints the ratings"""
 
-if __name__ == "__main__":
-    playing_board = deepcopy(NEW_BOARD)
+    _, ratings = run_tournament(
+        entrants, seed, max_games, report=report, checkpoint=checkpoint
+    )
+    print_ratings(ratings)
 
-    centers = {"X": [[3, 3], [4, 4]], "O": [[3, 4], [4, 3]]}
-    for key, value in centers.items():
-        playing_board[value[0][0]][value[0][1]] = key
-        playing_board[value[1][0]][value[1][1]] = key
 
-    print("R E V E R S E G A M : AI SIMULATION")
-    print()
-    time.sleep(2)
+def print_ratings(ratings: dict[str, float]) -> None:
+    """prints the ratings of a tournament, strongest first"""
 
-    print("LET'S BEGIN")
-    print(
-        dedent(
-            """
-    1. corner_first_computer:   applies corner moves otherwise retrieves coordinates with highest score
-                                and plays with it
-    2. side_first_computer:     applies side moves otherwise retrieves coordinates with highest score
-                                and plays with it
-    3. best_scoring_computer:   retrieves coordinates with highest score and plays with it
-    4. worst_scoring_computer:  retrieves coordinates with lowest score and plays with it
-    5. random_move_computer:    retrieves random coordinates and plays with it
-    """
+    print()
+    for identifier, rating in sorted(ratings.items(), key=lambda item: -item[1]):
+        print(f"{STRATEGIES[identifier].name:<25} {rating:+7.0f}")
+
+
+def play_simulation(
+    ai1: str,
+    ai2: str,
+    total_runs: int,
+    seed: int,
+    record_path: str,
+    compression: str,
+    profile_path: str,
+    trace_allocations: bool,
+    checkpoint: Checkpoint | None,
+) -> None:
+    """plays the games and prints the results"""
+
+    with ExitStack() as stack:
+        writer = None
+        if record_path:
+            writer = stack.enter_context(RecordWriter(record_path, compression))
+        profiler = None
+        if profile_path:
+            profiler = stack.enter_context(MoveProfiler(trace_allocations))
+        ai1_wins, ai2_wins, ties = run_simulation(
+            ai1,
+            ai2,
+            total_runs,
+            seed,
+            writer=writer,
+            profiler=profiler,
+            checkpoint=checkpoint,
         )
-    )
+    if profiler is not None:
+        profiler.export(profile_path)
+        print(f"Saved the profile to {profile_path}.")
+
+    print_results(ai1_wins, ai2_wins, ties, total_runs)
 
-    ai1 = ""
-    while re.match("^[1-5]$", ai1) is None:
-        print("Choose the first algorithm: (1~5)")
-        ai1 = input()
-    ai2 = ""
-    while re.match("^[1-5]$", ai2) is None:
-        print("Choose the second algorithm: (1~5)")
-        ai2 = input()
-    runs = ""
-    while re.match("^[0-9]+$", runs) is None:
-        print("How many times do you want to run the simulation?")
-        runs = input()
-
-    ai1_mark, ai2_mark = "X", "O"
-    ai1_wins, ai2_wins = 0, 0
-    ties = 0
-
-    total_runs = runs = int(runs)
-    while runs > 0:
-        while True:
-            allowed_ai1_moves = get_allowed_moves(ai1_mark, playing_board)
-            if allowed_ai1_moves:
-                chosen_algorithm(ai1, ai1_mark, allowed_ai1_moves, playing_board)
-            else:
-                ai1_score, ai2_score = get_scores(ai1_mark, ai2_mark, playing_board)
-                if ai1_score > ai2_score:
-                    ai1_wins += 1
-                elif ai1_score < ai2_score:
-                    ai2_wins += 1
-                else:
-                    ties += 1
-                break
-
-            allowed_ai2_moves = get_allowed_moves(ai2_mark, playing_board)
-            if allowed_ai2_moves:
-                chosen_algorithm(ai2, ai2_mark, allowed_ai2_moves, playing_board)
-            else:
-                ai1_score, ai2_score = get_scores(ai1_mark, ai2_mark, playing_board)
-                if ai1_score > ai2_score:
-                    ai1_wins += 1
-                elif ai1_score < ai2_score:
-                    ai2_wins += 1
-                else:
-                    ties += 1
-                break
-
-        runs -= 1
+
+def print_results(ai1_wins: int, ai2_wins: int, ties: int, total_runs: int) -> None:
+    """prints the wins and ties of a simulation"""
 
     print(f"Algorithm 1 has {ai1_wins} wins ({round((ai1_wins//total_runs)*100, 2)}%).")
     print(f"Algorithm 2 has {ai2_wins} wins ({round((ai2_wins//total_runs)*100, 2)}%).")
     print(f"{ties} games were tied ({round((ties//total_runs)*100, 2)}%).")
+
+
+def print_summary(results: dict) -> None:
+    """prints the results of a resumed run like those of a run set up here"""
+
+    if "ratings" in results:
+        print_ratings(results["ratings"])
+    else:
+        print_results(
+            results["ai1_wins"], results["ai2_wins"], results["ties"], results["runs"]
+        )
+
+
+def ask_checkpoint_path() -> str:
+    """asks where to keep the checkpoints of the run"""
+
+    print("Save checkpoints so the run can be resumed? (file name, or empty to skip)")
+
+    return input().strip()
+
+
+def play_interactively() -> None:
+    """asks for the settings of a run and plays it"""
+
+    time.sleep(2)
+
+    print("LET'S BEGIN")
+    print()
+    print(strategy_menu())
+    print()
+
+    tournament = ""
+    while tournament not in ["y", "n"]:
+        print("Play a round-robin tournament between the algorithms? (y/n)")
+        tournament = input().lower()
+
+    if tournament == "y":
+        entrants = None
+        while entrants is None:
+            print("Which algorithms take part? (eg. 1235, or empty for all)")
+            entrants = list(dict.fromkeys(input().strip())) or list(STRATEGIES)
+            if len(entrants) < 2 or not set(entrants) <= set(STRATEGIES):
+                entrants = None
+        max_games = ""
+        while re.match("^[1-9][0-9]*$", max_games) is None:
+            print("How many games may a pairing play at most?")
+            max_games = input()
+        checkpoint_path = ask_checkpoint_path()
+
+        seed = random.randrange(2**32)
+        print(f"Seed: {seed}")
+
+        checkpoint = None
+        if checkpoint_path:
+            checkpoint = Checkpoint.start(
+                checkpoint_path,
+                "tournament",
+                {"entrants": entrants, "seed": seed, "max_games": int(max_games)},
+            )
+        play_tournament(entrants, seed, int(max_games), checkpoint)
+    else:
+        ai1 = ""
+        while ai1 not in STRATEGIES:
+            print(f"Choose the first algorithm: (1~{len(STRATEGIES)})")
+            ai1 = input()
+        ai2 = ""
+        while ai2 not in STRATEGIES:
+            print(f"Choose the second algorithm: (1~{len(STRATEGIES)})")
+            ai2 = input()
+        runs = ""
+        while re.match("^[0-9]+$", runs) is None:
+            print("How many times do you want to run the simulation?")
+            runs = input()
+        # the lockstep mode only knows the first five algorithms
+        batch = "" if {ai1, ai2} <= {"1", "2", "3", "4", "5"} else "n"
+        while batch not in ["y", "n"]:
+            print("Play the games in lockstep with NumPy? (y/n)")
+            batch = input().lower()
+
+        # the lockstep mode does not keep the moves of its games
+        record_path = ""
+        profile_path = ""
+        trace = "n"
+        checkpoint_path = ""
+        if batch == "n":
+            print("Save the games to a record file? (file name, or empty to skip)")
+            record_path = input().strip()
+        compression = "" if record_path else "none"
+        while compression not in ["none", "zlib", "lzma"]:
+            print("Compress the records with zlib, lzma or none?")
+            compression = input().lower()
+        if batch == "n":
+            print("Profile the strategies? (JSON file name, or empty to skip)")
+            profile_path = input().strip()
+            trace = "" if profile_path else "n"
+            while trace not in ["y", "n"]:
+                print("Trace memory allocations too? Moves get much slower. (y/n)")
+                trace = input().lower()
+            checkpoint_path = ask_checkpoint_path()
+
+        # every game gets its own seed so a run can be repeated exactly
+        seed = random.randrange(2**32)
+        print(f"Seed: {seed}")
+
+        total_runs = int(runs)
+        if batch == "y":
+            # imported here so the other mode still works without NumPy installed
+            from rg_batch import simulate_batch
+
+            ai1_wins, ai2_wins, ties = simulate_batch(ai1, ai2, total_runs, seed)
+            print_results(ai1_wins, ai2_wins, ties, total_runs)
+        else:
+            checkpoint = None
+            if checkpoint_path:
+                checkpoint = Checkpoint.start(
+                    checkpoint_path,
+                    "simulation",
+                    {
+                        "ai1": ai1,
+                        "ai2": ai2,
+                        "runs": total_runs,
+                        "seed": seed,
+                        "record_path": record_path,
+                        "compression": compression,
+                    },
+                )
+            play_simulation(
+                ai1,
+                ai2,
+                total_runs,
+                seed,
+                record_path,
+                compression,
+                profile_path,
+                trace == "y",
+                checkpoint,
+            )
+
+
+if __name__ == "__main__":
+    parser = build_parser(__doc__, runs=100)
+    parser.add_argument(
+        "--tournament",
+        action="store_true",
+        help="with --headless, play every pair of the strategies",
+    )
+    arguments = parser.parse_args()
+    if arguments.tournament and not arguments.headless:
+        parser.error("--tournament needs --headless")
+
+    if arguments.headless:
+        run_headless(arguments, arguments.tournament)
+    elif arguments.resume:
+        print("R E V E R S E G A M : AI SIMULATION")
+        print()
+        run_headless(arguments, report=report, write=print_summary)
+    else:
+        print("R E V E R S E G A M : AI SIMULATION")
+        print()
+        play_interactively()
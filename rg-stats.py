@@ -0,0 +1,28 @@
+"""Prints statistics of the games saved by rg-sim3"""
+
+import os
+import time
+
+from rg_stats import collect_stats
+
+
+if __name__ == "__main__":
+    print("R E V E R S E G A M : SIMULATION STATISTICS")
+    print()
+    time.sleep(2)
+
+    paths: list[str] = []
+    while not paths:
+        print("Which record files should be read? (file names separated by spaces)")
+        paths = input().split()
+        missing = [path for path in paths if not os.path.exists(path)]
+        if missing:
+            print(f"Cannot find {', '.join(missing)}.")
+            paths = []
+
+    started = time.perf_counter()
+    stats = collect_stats(paths)
+    print()
+    print(stats.report())
+    print()
+    print(f"Read {stats.games} games in {time.perf_counter() - started:.1f} seconds.")
@@ -0,0 +1,271 @@
+"""Round-robin tournament between the registered reversegam strategies.
+
+Every pair of strategies plays games in blocks, taking turns at playing X,
+and after every block a sequential probability ratio test (SPRT) checks
+whether the games so far show that one of them is ELO_MARGIN points
+stronger than the other. The test stops a lopsided pairing after a few
+blocks and keeps playing a close one up to max_games. Ratings for all the
+strategies are fitted to every game played, BayesElo style: a Bradley-Terry
+model with ties counting half and a prior of one tie between every pair, so
+a strategy that never loses still gets a finite rating.
+
+Every game starts with OPENING_PLIES random moves, so strategies that always
+pick the same move still play different games, and each opening is played
+twice with the colours swapped so neither side gets the better of it."""
+
+import math
+import os
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import combinations
+
+from rg_checkpoint import Checkpoint
+from rg_runner import play_game
+
+# the pairings test elo -ELO_MARGIN against elo +ELO_MARGIN
+ELO_MARGIN = 50
+# chance of wrongly picking either side
+SPRT_ALPHA = 0.05
+SPRT_BETA = 0.05
+BLOCK_GAMES = 20
+# random moves at the start of every game
+OPENING_PLIES = 6
+MAX_GAMES = 1000
+# iterations of the rating fit
+RATING_ITERATIONS = 200
+# seeds of different pairings are this far apart, more than max_games
+PAIRING_SEED_STRIDE = 1_000_000
+
+
+def expected_score(elo: float) -> float:
+    """returns the expected score per game of a player elo points stronger"""
+
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_difference(score: float) -> float:
+    """returns the elo difference that gives the score per game"""
+
+    # a perfect score has no finite difference
+    score = min(max(score, 0.001), 0.999)
+
+    return -400 * math.log10(1 / score - 1)
+
+
+def sprt_llr(wins: int, ties: int, losses: int, elo0: float, elo1: float) -> float:
+    """returns the log likelihood ratio of elo1 against elo0 for the results,
+    using the normal approximation with the variance of the games played"""
+
+    games = wins + ties + losses
+    if not games:
+        return 0.0
+
+    score = (wins + ties / 2) / games
+    variance = (wins + ties / 4) / games - score**2
+    if variance <= 0:
+        # every game had the same result, use the largest variance instead
+        variance = 0.25
+    score0, score1 = expected_score(elo0), expected_score(elo1)
+
+    return (score1 - score0) * (2 * score - score0 - score1) * games / (2 * variance)
+
+
+def sprt_bounds(
+    alpha: float = SPRT_ALPHA, beta: float = SPRT_BETA
+) -> tuple[float, float]:
+    """returns the log likelihood ratios at which elo0 and elo1 are accepted"""
+
+    return (math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha))
+
+
+class Pairing:
+    """games of first against second, counted for first"""
+
+    def __init__(self, first: str, second: str):
+        self.first = first
+        self.second = second
+        self.wins = 0
+        self.ties = 0
+        self.losses = 0
+
+    @property
+    def games(self) -> int:
+        """returns the number of games played"""
+
+        return self.wins + self.ties + self.losses
+
+    def score(self) -> float:
+        """returns the score per game of first"""
+
+        return (self.wins + self.ties / 2) / self.games if self.games else 0.5
+
+    def llr(self) -> float:
+        """returns the log likelihood ratio of first being ELO_MARGIN points
+        stronger against it being ELO_MARGIN points weaker"""
+
+        return sprt_llr(self.wins, self.ties, self.losses, -ELO_MARGIN, ELO_MARGIN)
+
+    def decision(self) -> str | None:
+        """returns the stronger strategy once the test has decided, else None"""
+
+        lower, upper = sprt_bounds()
+        llr = self.llr()
+        if llr >= upper:
+            return self.first
+        if llr <= lower:
+            return self.second
+
+        return None
+
+
+def colours(first: str, second: str, index: int) -> tuple[str, str]:
+    """returns who plays X and who plays O in the pairing's game index"""
+
+    return (first, second) if index % 2 == 0 else (second, first)
+
+
+def play_block(
+    pairing: Pairing, seed: int, start: int, games: int, executor: Executor | None
+) -> None:
+    """plays games of the pairing from game number start and counts them"""
+
+    indexes = range(start, start + games)
+    players = [colours(pairing.first, pairing.second, index) for index in indexes]
+    # the two games of a seed play the same opening with swapped colours
+    seeds = [seed + index // 2 for index in indexes]
+    x_players = [x_player for x_player, _ in players]
+    o_players = [o_player for _, o_player in players]
+    openings = [OPENING_PLIES] * games
+
+    if executor is None:
+        results = map(play_game, x_players, o_players, seeds, openings)
+    else:
+        results = executor.map(play_game, x_players, o_players, seeds, openings)
+
+    for (x_player, _), (x_score, o_score) in zip(players, results):
+        first_score, second_score = (
+            (x_score, o_score) if x_player == pairing.first else (o_score, x_score)
+        )
+        if first_score > second_score:
+            pairing.wins += 1
+        elif first_score < second_score:
+            pairing.losses += 1
+        else:
+            pairing.ties += 1
+
+
+def save_progress(checkpoint: Checkpoint, pairing: Pairing) -> None:
+    """copies the tallies of the pairing to the checkpoint and saves it when
+    it is due"""
+
+    saved = checkpoint.pairing(pairing.first, pairing.second)
+    saved.update(wins=pairing.wins, ties=pairing.ties, losses=pairing.losses)
+    checkpoint.state["completed"] = sum(
+        saved["wins"] + saved["ties"] + saved["losses"]
+        for saved in checkpoint.state["pairings"]
+    )
+    checkpoint.save_if_due()
+
+
+def play_pairing(
+    pairing: Pairing,
+    seed: int,
+    max_games: int = MAX_GAMES,
+    executor: Executor | None = None,
+    checkpoint: Checkpoint | None = None,
+) -> Pairing:
+    """plays blocks of games until the test decides or max_games are played,
+    continuing from the games the pairing has counted already"""
+
+    while pairing.games < max_games and pairing.decision() is None:
+        games = min(BLOCK_GAMES, max_games - pairing.games)
+        play_block(pairing, seed, pairing.games, games, executor)
+        if checkpoint is not None:
+            save_progress(checkpoint, pairing)
+
+    return pairing
+
+
+def fit_ratings(pairings: list[Pairing]) -> dict[str, float]:
+    """returns the elo of every strategy in the pairings, averaging zero"""
+
+    players = sorted(
+        {pairing.first for pairing in pairings}
+        | {pairing.second for pairing in pairings}
+    )
+    # (player, opponent, points of player, games) with one prior tie each
+    matches = []
+    for pairing in pairings:
+        games = pairing.games + 1
+        points = pairing.wins + (pairing.ties + 1) / 2
+        matches.append((pairing.first, pairing.second, points, games))
+        matches.append((pairing.second, pairing.first, games - points, games))
+
+    # minorization-maximization updates of the Bradley-Terry strengths
+    strengths = dict.fromkeys(players, 1.0)
+    for _ in range(RATING_ITERATIONS):
+        for player in players:
+            points = sum(match[2] for match in matches if match[0] == player)
+            weight = sum(
+                games / (strengths[player] + strengths[opponent])
+                for first, opponent, _, games in matches
+                if first == player
+            )
+            strengths[player] = points / weight if weight else 1.0
+        mean = sum(math.log(strength) for strength in strengths.values()) / len(players)
+        strengths = {
+            player: math.exp(math.log(strength) - mean)
+            for player, strength in strengths.items()
+        }
+
+    return {
+        player: 400 * math.log10(strength) for player, strength in strengths.items()
+    }
+
+
+def run_tournament(
+    strategies: list[str],
+    seed: int = 0,
+    max_games: int = MAX_GAMES,
+    workers: int | None = None,
+    report: Callable[[Pairing], None] | None = None,
+    checkpoint: Checkpoint | None = None,
+) -> tuple[list[Pairing], dict[str, float]]:
+    """plays every pair of the strategies and returns the pairings and the
+    ratings. report is called with every finished pairing. with a checkpoint
+    the games it counted already are not played again"""
+
+    workers = workers or os.cpu_count() or 1
+
+    pairings = []
+    if checkpoint is not None:
+        checkpoint.save()
+    with ExitStack() as stack:
+        executor = None
+        if workers > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+        for number, (first, second) in enumerate(combinations(strategies, 2)):
+            pairing = Pairing(first, second)
+            if checkpoint is not None:
+                saved = checkpoint.pairing(first, second)
+                pairing.wins, pairing.ties, pairing.losses = (
+                    saved["wins"],
+                    saved["ties"],
+                    saved["losses"],
+                )
+            play_pairing(
+                pairing,
+                seed + number * PAIRING_SEED_STRIDE,
+                max_games,
+                executor,
+                checkpoint,
+            )
+            pairings.append(pairing)
+            if report is not None:
+                report(pairing)
+
+    if checkpoint is not None:
+        checkpoint.save()
+
+    return (pairings, fit_ratings(pairings))
@@ -0,0 +1,270 @@
+"""Plays thousands of reversegam games in lockstep with NumPy.
+
+The boards of a batch are kept as two uint64 arrays (one per mark) and every
+step of the game is done for all of them at once: legal moves, the number of
+tiles each candidate move flips, the move each strategy picks and the flips
+of the chosen moves. The strategies follow the ones in rg_strategies,
+including their tie-breaking, except random_move_computer which draws from
+NumPy's generator instead of the random module.
+
+Needs NumPy, which the rest of the games do not use."""
+
+import numpy as np
+
+from rg_engine import LEFT_SHIFTS, RIGHT_SHIFTS, starting_board, to_square
+
+ZERO = np.uint64(0)
+ONE = np.uint64(1)
+
+# (amount, mask, increases the square index) for the eight directions
+DIRECTIONS = [
+    (np.uint64(amount), np.uint64(mask), True) for amount, mask in LEFT_SHIFTS
+]
+DIRECTIONS += [
+    (np.uint64(amount), np.uint64(mask), False) for amount, mask in RIGHT_SHIFTS
+]
+
+# a1, h1, a8 and h8 come in the same order as in corner_first_computer
+CORNER_MASK = np.zeros(64, dtype=bool)
+CORNER_MASK[[to_square(corner) for corner in ["a1", "h1", "a8", "h8"]]] = True
+# side coordinates have "a" or "1" or "h" or "7" in them, as in side_first_computer
+SIDE_MASK = np.array(
+    [square % 8 in (0, 7) or square // 8 in (0, 6) for square in range(64)]
+)
+
+POPCOUNT_TABLE = np.array([bin(byte).count("1") for byte in range(256)], np.uint8)
+
+
+def popcount(bits: np.ndarray) -> np.ndarray:
+    """returns the number of set bits of each uint64"""
+
+    table = POPCOUNT_TABLE[bits.view(np.uint8)].reshape(-1, 8)
+
+    return table.sum(axis=1, dtype=np.int64)
+
+
+def unpack(bits: np.ndarray) -> np.ndarray:
+    """returns an (N, 64) array of 0/1 with column i holding bit i"""
+
+    return np.unpackbits(
+        bits.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little"
+    )
+
+
+def forward(bits: np.ndarray, amount: np.uint64, mask: np.uint64, up: bool):
+    """returns the bits moved one step in a direction"""
+
+    return ((bits << amount) if up else (bits >> amount)) & mask
+
+
+def backward(bits: np.ndarray, amount: np.uint64, mask: np.uint64, up: bool):
+    """returns the squares whose neighbour in a direction is one of the bits"""
+
+    return ((bits & mask) >> amount) if up else ((bits & mask) << amount)
+
+
+def flip_counts(player: np.ndarray, opponent: np.ndarray) -> np.ndarray:
+    """returns an (N, 64) array of the number of tiles each square flips,
+    zero for the squares that are not legal moves"""
+
+    empty = ~(player | opponent)
+    # bit-sliced counters: plane i holds bit i of every square's count,
+    # five planes are enough for the eighteen tiles a move can flip at most
+    total = [np.zeros_like(player) for _ in range(5)]
+
+    for amount, mask, up in DIRECTIONS:
+        # a direction flips at most six tiles, which fits in three planes
+        planes = [np.zeros_like(player) for _ in range(3)]
+        # opponent tiles followed by `run` - 1 more and then a player tile
+        closed = opponent & backward(player, amount, mask, up)
+        for run in range(1, 7):
+            reach = backward(closed, amount, mask, up)
+            squares = empty & reach
+            for bit in range(3):
+                if run >> bit & 1:
+                    planes[bit] |= squares
+            closed = opponent & reach
+            if not closed.any():
+                break
+
+        # ripple-carry add the direction's counts to the total
+        carry = np.zeros_like(player)
+        for bit in range(5):
+            addend = planes[bit] if bit < 3 else ZERO
+            partial = total[bit] ^ addend
+            next_carry = (total[bit] & addend) | (partial & carry)
+            total[bit] = partial ^ carry
+            carry = next_carry
+
+    counts = unpack(total[0])
+    for bit in range(1, 5):
+        counts |= unpack(total[bit]) << np.uint8(bit)
+
+    return counts
+
+
+def legal_moves(player: np.ndarray, opponent: np.ndarray) -> np.ndarray:
+    """returns the bitboards of legal moves of each board"""
+
+    empty = ~(player | opponent)
+    moves = np.zeros_like(player)
+
+    for amount, mask, up in DIRECTIONS:
+        run = forward(player, amount, mask, up) & opponent
+        for _ in range(5):
+            run |= forward(run, amount, mask, up) & opponent
+        moves |= forward(run, amount, mask, up) & empty
+
+    return moves
+
+
+def flips(moves: np.ndarray, player: np.ndarray, opponent: np.ndarray) -> np.ndarray:
+    """returns the tiles flipped by the single-bit moves, zero where there is
+    no move"""
+
+    flipped = np.zeros_like(player)
+
+    for amount, mask, up in DIRECTIONS:
+        run = forward(moves, amount, mask, up) & opponent
+        for _ in range(5):
+            run |= forward(run, amount, mask, up) & opponent
+        closed = forward(run, amount, mask, up) & player
+        flipped |= np.where(closed != ZERO, run, ZERO)
+
+    return flipped
+
+
+def best_scoring(player, opponent, legal: np.ndarray) -> np.ndarray:
+    """returns the first square with the most flips of each board"""
+
+    # every legal move flips something and every other square counts zero
+    return flip_counts(player, opponent).argmax(axis=1)
+
+
+def worst_scoring(player, opponent, legal: np.ndarray) -> np.ndarray:
+    """returns the first square with the fewest flips of each board"""
+
+    counts = flip_counts(player, opponent)
+    counts[counts == 0] = 255
+
+    return counts.argmin(axis=1)
+
+
+def first_in(squares: np.ndarray, legal: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """returns the lowest legal square among the 64 squares flagged True
+    and whether each board had one"""
+
+    candidates = (unpack(legal) != 0) & squares
+
+    return (candidates.argmax(axis=1), candidates.any(axis=1))
+
+
+def corner_first(player, opponent, legal: np.ndarray) -> np.ndarray:
+    """returns a corner if one is legal, otherwise the best scoring square"""
+
+    corner, has_corner = first_in(CORNER_MASK, legal)
+
+    return np.where(has_corner, corner, best_scoring(player, opponent, legal))
+
+
+def side_first(player, opponent, legal: np.ndarray) -> np.ndarray:
+    """returns the first legal side square, otherwise the best scoring square"""
+
+    side, has_side = first_in(SIDE_MASK, legal)
+
+    return np.where(has_side, side, best_scoring(player, opponent, legal))
+
+
+def random_move(player, opponent, legal: np.ndarray, rng) -> np.ndarray:
+    """returns a uniformly random legal square of each board"""
+
+    order = np.cumsum(unpack(legal), axis=1, dtype=np.uint8)
+    picks = (rng.random(len(legal)) * order[:, -1]).astype(np.int64)
+
+    return (order > picks[:, np.newaxis]).argmax(axis=1)
+
+
+def chosen_moves(
+    identifier: str, player: np.ndarray, opponent: np.ndarray, legal, rng
+) -> np.ndarray:
+    """returns the square each board's strategy plays"""
+
+    match identifier:
+        case "1":
+            return corner_first(player, opponent, legal)
+        case "2":
+            return side_first(player, opponent, legal)
+        case "3":
+            return best_scoring(player, opponent, legal)
+        case "4":
+            return worst_scoring(player, opponent, legal)
+        case "5":
+            return random_move(player, opponent, legal, rng)
+
+    raise ValueError(f"unknown algorithm: {identifier}")
+
+
+def starting_boards(games: int) -> tuple[np.ndarray, np.ndarray]:
+    """returns the X and O bitboards of games boards in the starting position"""
+
+    board = starting_board()
+
+    return (
+        np.full(games, board.discs["X"], dtype=np.uint64),
+        np.full(games, board.discs["O"], dtype=np.uint64),
+    )
+
+
+def play_batch(
+    ai1: str, ai2: str, games: int, rng: np.random.Generator
+) -> tuple[np.ndarray, np.ndarray]:
+    """plays games with ai1 as X and ai2 as O until the player to move has no
+    legal moves and returns the final X and O tile counts"""
+
+    discs = list(starting_boards(games))
+    active = np.ones(games, dtype=bool)
+    turn = 0
+
+    while active.any():
+        mover = turn % 2
+        identifier = ai1 if mover == 0 else ai2
+        player, opponent = discs[mover], discs[1 - mover]
+
+        legal = legal_moves(player, opponent)
+        # a game ends as soon as the player to move is stuck
+        active &= legal != ZERO
+        if not active.any():
+            break
+
+        squares = chosen_moves(
+            identifier, player[active], opponent[active], legal[active], rng
+        )
+        moves = np.zeros_like(player)
+        moves[active] = ONE << squares.astype(np.uint64)
+        flipped = flips(moves, player, opponent)
+
+        discs[mover] = player | moves | flipped
+        discs[1 - mover] = opponent ^ flipped
+        turn += 1
+
+    return (popcount(discs[0]), popcount(discs[1]))
+
+
+def simulate_batch(
+    ai1: str, ai2: str, games: int, seed: int = 0, batch_size: int = 100_000
+) -> tuple[int, int, int]:
+    """plays games in batches of batch_size and returns ai1 wins, ai2 wins
+    and ties"""
+
+    rng = np.random.default_rng(seed)
+    ai1_wins, ai2_wins, ties = 0, 0, 0
+
+    for start in range(0, games, batch_size):
+        ai1_scores, ai2_scores = play_batch(
+            ai1, ai2, min(batch_size, games - start), rng
+        )
+        ai1_wins += int((ai1_scores > ai2_scores).sum())
+        ai2_wins += int((ai1_scores < ai2_scores).sum())
+        ties += int((ai1_scores == ai2_scores).sum())
+
+    return (ai1_wins, ai2_wins, ties)
@@ -0,0 +1,362 @@
+"""Move generation check and benchmarks for the reversegam engine.
+
+perft counts the positions reached after every sequence of depth moves from
+a position. A player without valid moves passes while the opponent can still
+move, and a position where neither can move is a leaf however deep it is.
+These rules match the usual Othello perft, so the counts from the starting
+board can be checked against PERFT_COUNTS, and the time taken gives a
+nodes per second figure. The other benchmarks time the engine functions the
+games call and every strategy of chosen_algorithm on a corpus of positions
+from seeded random games, so runs on different versions are comparable.
+Strategies are timed more often the cheaper their cost class, and the ones
+with a batch version are timed through choose_moves as well.
+order_dependent plays a few games of every strategy in turn in this process
+and each in a new process of its own, to check that a game only depends on
+its seed and not on the games played before it, and resume_matches checks
+that a run stopped partway and resumed from its checkpoint gives the same
+results and records as one played in one go."""
+
+import functools
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from rg_checkpoint import Checkpoint
+from rg_endgame import solve_position
+from rg_engine import (
+    Board,
+    get_allowed_moves,
+    get_scores,
+    legal_moves,
+    opponent_of,
+    squares_of,
+    starting_board,
+    valid_move,
+)
+from rg_records import RecordWriter, read_records
+from rg_runner import play_full_game, run_simulation
+from rg_search import pattern_searched_move, searched_move
+from rg_strategies import STRATEGIES, Candidates, choose_moves, chosen_algorithm
+
+# leaf counts from the starting board by depth
+PERFT_COUNTS = {
+    1: 4,
+    2: 12,
+    3: 56,
+    4: 244,
+    5: 1396,
+    6: 8200,
+    7: 55092,
+    8: 390216,
+    9: 3005288,
+    10: 24571284,
+}
+
+CORPUS_SEED = 20240101
+CORPUS_SIZE = 100
+# the engine calls are too quick to time over the corpus only once
+ENGINE_REPEATS = 100
+# times a strategy's moves are timed over the corpus, by its cost class
+COST_REPEATS = {"cheap": ENGINE_REPEATS, "greedy": 10, "search": 1}
+# random games played to see how often legal moves are carried over
+CARRIED_GAMES = 100
+# games played alone and in turn to see whether a game depends on the others
+ORDER_GAMES = 3
+# games of the run that is stopped and resumed
+RESUME_GAMES = 8
+
+
+def perft(board: Board, mark: str, depth: int) -> int:
+    """returns the number of positions depth moves (passes included) below
+    the board with mark to move"""
+
+    if depth == 0:
+        return 1
+
+    opponent_mark = opponent_of(mark)
+    moves = legal_moves(board.discs[mark], board.discs[opponent_mark])
+    if not moves:
+        # pass if the opponent can move, otherwise the game is over
+        if not legal_moves(board.discs[opponent_mark], board.discs[mark]):
+            return 1
+        return perft(board, opponent_mark, depth - 1)
+
+    if depth == 1:
+        return moves.bit_count()
+
+    nodes = 0
+    for square in squares_of(moves):
+        board.apply(mark, square)
+        nodes += perft(board, opponent_mark, depth - 1)
+        board.undo()
+
+    return nodes
+
+
+def run_perft(depth: int) -> list[tuple[int, int, float]]:
+    """returns the leaf count and the seconds taken from the starting board
+    for every depth up to depth"""
+
+    results = []
+    for current_depth in range(1, depth + 1):
+        board = starting_board()
+        started = time.perf_counter()
+        nodes = perft(board, "X", current_depth)
+        results.append((current_depth, nodes, time.perf_counter() - started))
+
+    return results
+
+
+def carried_moves(games: int = CARRIED_GAMES) -> tuple[int, int]:
+    """returns how often Board carried legal moves over from an earlier
+    position and how often it scanned for them in games random games"""
+
+    carried, scanned = 0, 0
+    for seed in range(CORPUS_SEED, CORPUS_SEED + games):
+        board = play_full_game("5", "5", seed)
+        carried += board.moves_carried
+        scanned += board.moves_scanned
+
+    return (carried, scanned)
+
+
+def game_moves(ai: str, seed: int) -> list[tuple[str, int, int, int, int]]:
+    """returns the moves of the strategy's game of the seed against the
+    random player"""
+
+    return play_full_game(ai, "5", seed).stack
+
+
+def order_dependent(seed: int = CORPUS_SEED, games: int = ORDER_GAMES) -> list[str]:
+    """returns the strategies whose games against the random player change
+    when other games were played before them in the same process. every game
+    is played once in this process, after all the ones before it, and once
+    in a new process of its own"""
+
+    seeds = list(range(seed, seed + games))
+    dependent = []
+    with ProcessPoolExecutor(
+        mp_context=multiprocessing.get_context("spawn"), max_tasks_per_child=1
+    ) as executor:
+        for ai in STRATEGIES:
+            alone = executor.map(game_moves, repeat(ai), seeds)
+            in_turn = [game_moves(ai, game_seed) for game_seed in seeds]
+            if in_turn != list(alone):
+                dependent.append(ai)
+
+    return dependent
+
+
+class StopRun(Exception):
+    """raised to stop a run partway through, as a crash would"""
+
+
+def resume_run(
+    ai1: str, ai2: str, runs: int, seed: int, checkpoint_path: str
+) -> tuple[int, int, int]:
+    """resumes the run saved at checkpoint_path and returns its tallies"""
+
+    checkpoint = Checkpoint.load(checkpoint_path)
+    checkpoint.truncate_records()
+    record_path = checkpoint.state["settings"]["record_path"]
+    with RecordWriter(record_path) as writer:
+        return run_simulation(ai1, ai2, runs, seed, 1, writer, checkpoint=checkpoint)
+
+
+def resume_matches(
+    ai1: str = "6", ai2: str = "5", runs: int = RESUME_GAMES, seed: int = CORPUS_SEED
+) -> bool:
+    """plays runs games in one go, then again in a run that stops after its
+    second chunk and is resumed from its checkpoint in a new process, and
+    returns whether both give the same tallies and the same records"""
+
+    with tempfile.TemporaryDirectory() as directory:
+        whole_path = os.path.join(directory, "whole.rec")
+        with RecordWriter(whole_path) as writer:
+            whole = run_simulation(ai1, ai2, runs, seed, 1, writer=writer)
+
+        record_path = os.path.join(directory, "resumed.rec")
+        checkpoint_path = os.path.join(directory, "resumed.json")
+        checkpoint = Checkpoint.start(
+            checkpoint_path, "simulation", {"record_path": record_path}
+        )
+        # saved after every chunk, so the first one is kept
+        checkpoint.interval = 0
+        chunks = []
+
+        def stop(done: int) -> None:
+            chunks.append(done)
+            if len(chunks) == 2:
+                raise StopRun
+
+        writer = RecordWriter(record_path)
+        try:
+            run_simulation(
+                ai1,
+                ai2,
+                runs,
+                seed,
+                1,
+                writer,
+                checkpoint=checkpoint,
+                progress=stop,
+            )
+        except StopRun:
+            # records still buffered are lost, as in a crash
+            writer.file.close()
+
+        # a crashed run is resumed by a new process
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            resumed = executor.submit(
+                resume_run, ai1, ai2, runs, seed, checkpoint_path
+            ).result()
+
+        return whole == resumed and list(read_records(whole_path)) == list(
+            read_records(record_path)
+        )
+
+
+def build_corpus(size: int = CORPUS_SIZE, seed: int = CORPUS_SEED) -> list[Board]:
+    """returns size positions spread over the game from random games, with
+    X to move in every one of them"""
+
+    generator = random.Random(seed)
+    corpus: list[Board] = []
+
+    while len(corpus) < size:
+        board = starting_board()
+        mark = "X"
+        while True:
+            moves = squares_of(
+                legal_moves(board.discs[mark], board.discs[opponent_of(mark)])
+            )
+            if not moves:
+                break
+            if mark == "X" and generator.random() < 0.25 and len(corpus) < size:
+                corpus.append(Board(board.discs))
+            board.apply(mark, generator.choice(moves))
+            mark = opponent_of(mark)
+
+    return corpus
+
+
+def time_calls(
+    call: Callable[[Board], int], corpus: list[Board], repeats: int = 1
+) -> tuple[int, float]:
+    """runs call on a copy of every board of the corpus repeats times and
+    returns the number of calls it reported and the seconds taken"""
+
+    # fresh copies every repeat, so no board remembers its legal moves
+    boards = [board.copy() for _ in range(repeats) for board in corpus]
+    calls = 0
+    started = time.perf_counter()
+    for board in boards:
+        calls += call(board)
+
+    return (calls, time.perf_counter() - started)
+
+
+def valid_moves_of(board: Board) -> int:
+    """plays and takes back every allowed move of X"""
+
+    allowed_moves = get_allowed_moves("X", board)
+    for coordinates in allowed_moves:
+        valid_move("X", coordinates, board)
+        board.undo()
+
+    return len(allowed_moves)
+
+
+def allowed_moves_of(board: Board) -> int:
+    """generates the allowed moves of both players"""
+
+    get_allowed_moves("X", board)
+    get_allowed_moves("O", board)
+
+    return 2
+
+
+def scores_of(board: Board) -> int:
+    """counts the tiles of both players"""
+
+    get_scores("X", "O", board)
+
+    return 1
+
+
+def strategy_move(ai: str) -> Callable[[Board], int]:
+    """returns a call that lets the strategy move for X"""
+
+    def call(board: Board) -> int:
+        allowed_moves = get_allowed_moves("X", board)
+        if not allowed_moves:
+            return 0
+        chosen_algorithm(ai, "X", allowed_moves, board)
+        board.undo()
+        return 1
+
+    return call
+
+
+def time_batch(ai: str, corpus: list[Board], repeats: int = 1) -> tuple[int, float]:
+    """lets the strategy choose the moves of X in a copy of every board of
+    the corpus repeats times, all in one choose_moves call, and returns the
+    number of moves and the seconds taken"""
+
+    positions = [
+        Candidates("X", get_allowed_moves("X", board), board)
+        for board in (board.copy() for _ in range(repeats) for board in corpus)
+    ]
+    # the first call imports NumPy, which is not part of choosing
+    choose_moves(ai, positions[:1])
+    started = time.perf_counter()
+    choose_moves(ai, positions)
+
+    return (len(positions), time.perf_counter() - started)
+
+
+def run_benchmarks(corpus: list[Board]) -> list[tuple[str, int, float]]:
+    """returns the name, number of calls and seconds taken of every benchmark
+    on the corpus"""
+
+    benchmarks: list[tuple[str, Callable[[], tuple[int, float]]]] = [
+        (name, functools.partial(time_calls, call, corpus, ENGINE_REPEATS))
+        for name, call in [
+            ("valid_move", valid_moves_of),
+            ("get_allowed_moves", allowed_moves_of),
+            ("get_scores", scores_of),
+        ]
+    ]
+    for ai, registered in STRATEGIES.items():
+        repeats = COST_REPEATS[registered.cost]
+        benchmarks.append(
+            (
+                registered.name,
+                functools.partial(time_calls, strategy_move(ai), corpus, repeats),
+            )
+        )
+        if registered.choose_batch is not None:
+            benchmarks.append(
+                (
+                    f"{registered.name} batch",
+                    functools.partial(time_batch, ai, corpus, repeats),
+                )
+            )
+
+    results = []
+    for name, benchmark in benchmarks:
+        # the same seed and cold caches every run, so the work is the same
+        random.seed(CORPUS_SEED)
+        searched_move.cache_clear()  # type: ignore[attr-defined]
+        pattern_searched_move.cache_clear()  # type: ignore[attr-defined]
+        solve_position.cache_clear()  # type: ignore[attr-defined]
+        results.append((name, *benchmark()))
+
+    return results
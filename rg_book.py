@@ -0,0 +1,187 @@
+"""Opening book for reversegam built from self-play.
+
+build_book takes finished self-play games, tallies for every position of the
+first BOOK_PLIES moves how each move scored for the player who made it, and
+writes the best move of every position. Moves are ranked by the lower bound
+of a confidence interval on their score, so a move that won its only few
+games does not beat one that scored well over many, and moves played in
+fewer than MIN_GAMES games are left out. The self-play games start with
+OPENING_PLIES random moves, so a deterministic strategy still tries
+different moves in the early positions instead of one line.
+
+The file is a small header followed by fixed-size records sorted by position
+key, so OpeningBook can binary search it through mmap without reading the
+whole file, and processes that open the same book share its pages. The key
+is the Zobrist hash of the position's symmetry class with the player to move
+counted as X, and moves are stored in that class's orientation, so mirror
+images of an opening share one record. rg-book builds the default book."""
+
+import functools
+import math
+import mmap
+import os
+import struct
+from collections.abc import Iterable
+
+from rg_engine import Board, get_scores, opponent_of, starting_board
+from rg_symmetry import canonical_key, from_canonical, to_canonical
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reversegam.book")
+BOOK_PLIES = 14
+# moves played in fewer games are left out of the book
+MIN_GAMES = 8
+# random moves at the start of every self-play game
+OPENING_PLIES = 6
+# width of the confidence interval moves are ranked by, in standard deviations
+CONFIDENCE_Z = 1.96
+
+MAGIC = b"RGBK"
+VERSION = 2
+# magic, version, number of records
+HEADER = struct.Struct("<4sII")
+# position key, best move, games that played it, points it scored (two per
+# win and one per tie for the player who made the move)
+RECORD = struct.Struct("<QB3xII")
+
+
+def tally_game(tallies: dict[int, dict[int, list[int]]], board: Board) -> None:
+    """adds the opening moves of a finished game to the per position and
+    move [games, points] tallies"""
+
+    x_score, o_score = get_scores("X", "O", board)
+
+    # replay the opening to see each position it went through
+    replay = starting_board()
+    for mark, square, _, _, _ in board.stack[:BOOK_PLIES]:
+        key, symmetry = canonical_key(
+            replay.discs[mark], replay.discs[opponent_of(mark)]
+        )
+        replay.apply(mark, square)
+        mover_score, other_score = (
+            (x_score, o_score) if mark == "X" else (o_score, x_score)
+        )
+        points = 2 if mover_score > other_score else int(mover_score == other_score)
+
+        tally = tallies.setdefault(key, {}).setdefault(
+            to_canonical(square, symmetry), [0, 0]
+        )
+        tally[0] += 1
+        tally[1] += points
+
+
+def lower_bound(played: int, points: int, z: float = CONFIDENCE_Z) -> float:
+    """returns the Wilson lower bound of the score per game of a move that
+    scored points (two per win) in played games"""
+
+    score = points / (2 * played)
+    spread = z * math.sqrt(score * (1 - score) / played + z * z / (4 * played**2))
+
+    return (score + z * z / (2 * played) - spread) / (1 + z * z / played)
+
+
+def build_book(path: str, games: Iterable[Board]) -> int:
+    """writes the book of the finished games to path and returns the number
+    of positions in it"""
+
+    # position key -> square -> [games, points]
+    tallies: dict[int, dict[int, list[int]]] = {}
+    for board in games:
+        tally_game(tallies, board)
+
+    records = []
+    for key, squares in tallies.items():
+        candidates = [
+            (square, tally)
+            for square, tally in squares.items()
+            if tally[0] >= MIN_GAMES
+        ]
+        if not candidates:
+            continue
+        # the surest good score, the more often played move on a tie
+        square, (played, points) = max(
+            candidates, key=lambda item: (lower_bound(*item[1]), item[1][0])
+        )
+        records.append((key, square, played, points))
+    records.sort()
+
+    # write next to the target and rename so readers never see half a book
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as book_file:
+        book_file.write(HEADER.pack(MAGIC, VERSION, len(records)))
+        for record in records:
+            book_file.write(RECORD.pack(*record))
+    os.replace(temporary_path, path)
+
+    return len(records)
+
+
+class OpeningBook:
+    """read-only view of a book file through mmap"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as book_file:
+            self.map = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a version {VERSION} reversegam book")
+
+    def close(self) -> None:
+        """releases the mapping"""
+
+        self.map.close()
+
+    def __enter__(self) -> "OpeningBook":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def lookup(self, key: int) -> tuple[int, int, int] | None:
+        """returns the best move, games and points stored for the position
+        key, or None when the position is not in the book"""
+
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * RECORD.size
+            record = RECORD.unpack_from(self.map, offset)
+            if record[0] < key:
+                low = middle + 1
+            elif record[0] > key:
+                high = middle
+            else:
+                return record[1:]
+
+        return None
+
+    def move(self, board: Board, mark: str) -> int | None:
+        """returns the book move for the player in this position, if any"""
+
+        key, symmetry = canonical_key(board.discs[mark], board.discs[opponent_of(mark)])
+        entry = self.lookup(key)
+        if entry is None:
+            return None
+
+        square = from_canonical(entry[0], symmetry)
+
+        return square if board.is_legal(mark, square) else None
+
+
+@functools.cache
+def default_book() -> OpeningBook | None:
+    """returns the book at BOOK_PATH, or None when it has not been built"""
+
+    if not os.path.exists(BOOK_PATH):
+        return None
+
+    return OpeningBook(BOOK_PATH)
+
+
+def book_move(board: Board, mark: str) -> int | None:
+    """returns the move of the default book for the position, if any"""
+
+    book = default_book()
+
+    return book.move(board, mark) if book is not None else None
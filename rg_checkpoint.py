@@ -0,0 +1,112 @@
+"""Checkpoints that let long reversegam simulations resume after a crash.
+
+A checkpoint is a JSON file holding the settings of a run, how many games
+are done, the tallies of every pairing, the seed of the next game, the
+state of the random module and, when games are recorded, how long the record
+file was at that moment. Every game's seed follows from the run's seed and
+the game's number, so a resumed run plays the games that were not counted
+yet with the seeds the interrupted run would have used. They are the same
+games as long as every strategy's moves only depend on the seed and the
+position and not on the games played before in the process, which rg-bench
+checks. The file is written next to its target, synced and renamed over it,
+so a crash while saving leaves the previous checkpoint intact."""
+
+import json
+import os
+import random
+import time
+
+from rg_records import RecordWriter
+
+VERSION = 1
+# seconds between checkpoints while a run is going
+CHECKPOINT_SECONDS = 60
+
+
+class Checkpoint:
+    """the saved state of one run"""
+
+    def __init__(self, path: str, state: dict, interval: float = CHECKPOINT_SECONDS):
+        self.path = path
+        self.state = state
+        self.interval = interval
+        self.saved_at = time.monotonic()
+
+    @classmethod
+    def start(cls, path: str, mode: str, settings: dict) -> "Checkpoint":
+        """returns the checkpoint of a new run"""
+
+        state = {
+            "version": VERSION,
+            "mode": mode,
+            "settings": settings,
+            "completed": 0,
+            "pairings": [],
+            "next_seed": settings.get("seed", 0),
+            "record_offset": None,
+            "random_state": None,
+        }
+
+        return cls(path, state)
+
+    @classmethod
+    def load(cls, path: str) -> "Checkpoint":
+        """returns the checkpoint saved at path and restores the random
+        module to where it was"""
+
+        with open(path) as checkpoint_file:
+            state = json.load(checkpoint_file)
+        if state.get("version") != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} checkpoint")
+
+        if state["random_state"] is not None:
+            version, internal, gauss = state["random_state"]
+            random.setstate((version, tuple(internal), gauss))
+
+        return cls(path, state)
+
+    def pairing(self, first: str, second: str) -> dict:
+        """returns the saved tallies of first against second, adding empty
+        ones when the pairing has not started"""
+
+        for pairing in self.state["pairings"]:
+            if (pairing["first"], pairing["second"]) == (first, second):
+                return pairing
+
+        pairing = {"first": first, "second": second, "wins": 0, "ties": 0, "losses": 0}
+        self.state["pairings"].append(pairing)
+
+        return pairing
+
+    def save(self, writer: RecordWriter | None = None) -> None:
+        """writes the state to the checkpoint file atomically, after writing
+        out the records buffered by writer so the file matches the tallies"""
+
+        if writer is not None:
+            writer.flush()
+            os.fsync(writer.file.fileno())
+            self.state["record_offset"] = writer.file.tell()
+        self.state["random_state"] = random.getstate()
+
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as checkpoint_file:
+            json.dump(self.state, checkpoint_file, indent=2)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temporary_path, self.path)
+
+        self.saved_at = time.monotonic()
+
+    def save_if_due(self, writer: RecordWriter | None = None) -> None:
+        """saves when interval seconds have passed since the last save"""
+
+        if time.monotonic() - self.saved_at >= self.interval:
+            self.save(writer)
+
+    def truncate_records(self) -> None:
+        """cuts the record file of the run back to its length at the last
+        save, as the games recorded after it are played again"""
+
+        record_path = self.state["settings"].get("record_path")
+        if record_path and self.state["record_offset"] is not None:
+            os.truncate(record_path, self.state["record_offset"])
@@ -0,0 +1,249 @@
+"""Command line options shared by the rg-sim simulators.
+
+With --headless a simulator asks nothing and does not pause: the strategies,
+number of games, seed, worker processes and output file come from the
+options, progress goes to stderr and the results are written as JSON to the
+output file (or stdout). Every game starts from a fresh starting board and
+gets the seed of the run plus its number, so a queued configuration can be
+repeated exactly. --resume continues a run from its checkpoint with the
+settings saved in it and writes its results the same way, or hands them to
+the simulator's own output when it resumes without --headless."""
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections.abc import Callable
+
+from rg_arena import Pairing, run_tournament
+from rg_checkpoint import Checkpoint
+from rg_records import COMPRESSIONS, RecordWriter
+from rg_runner import run_simulation
+from rg_strategies import STRATEGIES
+
+# seconds between progress lines
+PROGRESS_SECONDS = 1.0
+
+
+def build_parser(
+    description: str | None, strategies: list[str] | None = None, runs: int = 1
+) -> argparse.ArgumentParser:
+    """returns the parser of a simulator's options, with the strategies and
+    number of games it plays by default"""
+
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run without prompts, taking the settings from the options",
+    )
+    parser.add_argument(
+        "--strategies",
+        nargs="+",
+        metavar="ID",
+        choices=list(STRATEGIES),
+        default=strategies,
+        help="the algorithms that play (two, or more with --tournament)",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=runs,
+        help="number of games (most games per pairing with --tournament)",
+    )
+    parser.add_argument("--seed", type=int, help="seed of the first game")
+    parser.add_argument("--workers", type=int, help="worker processes to use")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--records", help="append the games to this record file")
+    parser.add_argument(
+        "--compression", choices=list(COMPRESSIONS.values()), default="zlib"
+    )
+    parser.add_argument("--checkpoint", help="keep resumable progress in this file")
+    parser.add_argument(
+        "--resume",
+        metavar="CHECKPOINT",
+        help="continue the run saved in CHECKPOINT, taking its settings from it",
+    )
+
+    return parser
+
+
+class Progress:
+    """reports finished games on stderr at most every PROGRESS_SECONDS"""
+
+    def __init__(self, total: int, label: str = "games"):
+        self.total = total
+        self.label = label
+        self.started = time.perf_counter()
+        self.reported_at = 0.0
+
+    def __call__(self, done: int) -> None:
+        now = time.perf_counter()
+        if now - self.reported_at < PROGRESS_SECONDS and done < self.total:
+            return
+
+        self.reported_at = now
+        elapsed = now - self.started
+        print(
+            f"{done}/{self.total} {self.label} in {elapsed:.1f}s "
+            f"({done / max(elapsed, 1e-9):.1f}/s)",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+def report_pairing(pairing: Pairing) -> None:
+    """reports a finished tournament pairing on stderr"""
+
+    print(
+        f"{pairing.first} vs {pairing.second}: {pairing.games} games",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def write_results(results: dict, path: str | None) -> None:
+    """writes the results as JSON to path, or to stdout without one"""
+
+    if path is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+
+    with open(path, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+        output_file.write("\n")
+
+
+def play_tournament(
+    arguments: argparse.Namespace,
+    settings: dict,
+    checkpoint: Checkpoint | None,
+    report: Callable[[Pairing], None] = report_pairing,
+) -> dict:
+    """plays the tournament the settings describe, calling report with every
+    finished pairing, and returns its results"""
+
+    pairings, ratings = run_tournament(
+        settings["entrants"],
+        settings["seed"],
+        settings["max_games"],
+        arguments.workers,
+        report=report,
+        checkpoint=checkpoint,
+    )
+
+    return {
+        **settings,
+        "pairings": [
+            {
+                "first": pairing.first,
+                "second": pairing.second,
+                "wins": pairing.wins,
+                "ties": pairing.ties,
+                "losses": pairing.losses,
+                "decision": pairing.decision(),
+            }
+            for pairing in pairings
+        ],
+        "ratings": ratings,
+    }
+
+
+def play_simulation(
+    arguments: argparse.Namespace, settings: dict, checkpoint: Checkpoint | None
+) -> dict:
+    """plays the games the settings describe and returns their results"""
+
+    writer = None
+    if settings["record_path"]:
+        writer = RecordWriter(settings["record_path"], settings["compression"])
+    try:
+        ai1_wins, ai2_wins, ties = run_simulation(
+            settings["ai1"],
+            settings["ai2"],
+            settings["runs"],
+            settings["seed"],
+            arguments.workers,
+            writer=writer,
+            checkpoint=checkpoint,
+            progress=Progress(settings["runs"]),
+        )
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return {
+        "ai1": settings["ai1"],
+        "ai2": settings["ai2"],
+        "runs": settings["runs"],
+        "seed": settings["seed"],
+        "ai1_wins": ai1_wins,
+        "ai2_wins": ai2_wins,
+        "ties": ties,
+    }
+
+
+def run_headless(
+    arguments: argparse.Namespace,
+    tournament: bool = False,
+    report: Callable[[Pairing], None] = report_pairing,
+    write: Callable[[dict], None] | None = None,
+) -> None:
+    """plays the games the options or the checkpoint to resume describe and
+    writes the results as JSON, or passes them to write when given one.
+    report is called with every finished tournament pairing"""
+
+    started = time.perf_counter()
+
+    if arguments.resume:
+        checkpoint = Checkpoint.load(arguments.resume)
+        settings = checkpoint.state["settings"]
+        tournament = checkpoint.state["mode"] == "tournament"
+        # records written after the checkpoint are of games played again
+        checkpoint.truncate_records()
+        print(
+            f"Resuming after {checkpoint.state['completed']} games",
+            file=sys.stderr,
+            flush=True,
+        )
+    else:
+        strategies = arguments.strategies or []
+        if len(strategies) < 2 or (len(strategies) > 2 and not tournament):
+            raise SystemExit("--headless needs two --strategies")
+        if arguments.runs < 1:
+            raise SystemExit("--runs must be at least 1")
+
+        seed = random.randrange(2**32) if arguments.seed is None else arguments.seed
+        if tournament:
+            settings = {
+                "entrants": strategies,
+                "seed": seed,
+                "max_games": arguments.runs,
+            }
+        else:
+            ai1, ai2 = strategies
+            settings = {
+                "ai1": ai1,
+                "ai2": ai2,
+                "runs": arguments.runs,
+                "seed": seed,
+                "record_path": arguments.records or "",
+                "compression": arguments.compression,
+            }
+        checkpoint = None
+        if arguments.checkpoint:
+            mode = "tournament" if tournament else "simulation"
+            checkpoint = Checkpoint.start(arguments.checkpoint, mode, settings)
+
+    if tournament:
+        results = play_tournament(arguments, settings, checkpoint, report)
+    else:
+        results = play_simulation(arguments, settings, checkpoint)
+
+    results["seconds"] = round(time.perf_counter() - started, 3)
+    if write is None:
+        write_results(results, arguments.output)
+    else:
+        write(results)
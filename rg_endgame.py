@@ -0,0 +1,183 @@
+"""Exact endgame solver for reversegam.
+
+With few empty squares left the whole rest of the game can be searched, so
+instead of guessing with a heuristic the solver returns the exact final tile
+difference with perfect play from both sides. It runs alpha-beta straight on
+the bitboard integers and orders moves two ways:
+
+- parity: moves into a quadrant with an odd number of empty squares come
+  first, since the player who moves last in a region usually keeps it
+- fastest first: while many squares are empty, moves that leave the opponent
+  the fewest replies come first, which prunes the most
+
+As everywhere else in these games, the game ends as soon as the player to
+move has no valid moves. Solved positions are cached by their symmetry class,
+so a position and its mirror images are only solved once. A solve can be
+given a deadline, and gives up with SolveTimeout when it passes, so a timed
+player can search instead of waiting for the exact answer."""
+
+import time
+
+from rg_engine import Board, FULL, flips, legal_moves, opponent_of, squares_of
+from rg_symmetry import symmetric_cache
+
+# search exactly once this many squares or fewer are empty
+ENDGAME_EMPTIES = 12
+# below this many empty squares counting replies costs more than it saves
+FASTEST_FIRST_EMPTIES = 7
+# positions with more empty squares than this are kept in the solver's table
+TABLE_EMPTIES = 6
+
+
+class SolveTimeout(Exception):
+    """raised inside the solver when its deadline has passed"""
+
+
+QUADRANTS = [
+    sum(1 << (row * 8 + column) for row in rows for column in columns)
+    for rows in (range(0, 4), range(4, 8))
+    for columns in (range(0, 4), range(4, 8))
+]
+QUADRANT_OF = [
+    next(index for index, quadrant in enumerate(QUADRANTS) if quadrant >> square & 1)
+    for square in range(64)
+]
+
+
+def ordered_moves(player: int, opponent: int, moves: int) -> list[int]:
+    """returns the squares of the moves, odd quadrants first and, while the
+    board is still open, fewest opponent replies first"""
+
+    squares = squares_of(moves)
+    if len(squares) < 2:
+        return squares
+
+    empty = ~(player | opponent) & FULL
+    odd = [(empty & quadrant).bit_count() & 1 for quadrant in QUADRANTS]
+
+    if empty.bit_count() <= FASTEST_FIRST_EMPTIES:
+        return sorted(squares, key=lambda square: not odd[QUADRANT_OF[square]])
+
+    keys = {}
+    for square in squares:
+        flipped = flips(square, player, opponent)
+        replies = legal_moves(opponent ^ flipped, player | flipped | (1 << square))
+        keys[square] = (replies.bit_count(), not odd[QUADRANT_OF[square]])
+
+    return sorted(squares, key=keys.__getitem__)
+
+
+def solve(
+    player: int,
+    opponent: int,
+    alpha: int = -64,
+    beta: int = 64,
+    table: dict[tuple[int, int], tuple[int, int]] | None = None,
+    deadline: float | None = None,
+) -> int:
+    """returns the final tile difference for the player to move with perfect
+    play, exact when it lies between alpha and beta. bounds found for
+    positions with many empty squares are kept in table. raises SolveTimeout
+    once the perf_counter deadline has passed"""
+
+    if deadline is not None and time.perf_counter() > deadline:
+        raise SolveTimeout
+    moves = legal_moves(player, opponent)
+    if not moves:
+        return player.bit_count() - opponent.bit_count()
+
+    key = (player, opponent)
+    if table is not None:
+        lower, upper = table.get(key, (-64, 64))
+        if lower >= beta:
+            return lower
+        if upper <= alpha:
+            return upper
+        alpha, beta = max(alpha, lower), min(beta, upper)
+
+    original_alpha = alpha
+    empties = 64 - (player | opponent).bit_count()
+    # smaller positions are solved faster than they are looked up
+    child_table = table if empties > TABLE_EMPTIES else None
+
+    best = -65
+    for square in ordered_moves(player, opponent, moves):
+        flipped = flips(square, player, opponent)
+        value = -solve(
+            opponent ^ flipped,
+            player | flipped | (1 << square),
+            -beta,
+            -alpha,
+            child_table,
+            deadline,
+        )
+        if value > best:
+            best = value
+            if value > alpha:
+                alpha = value
+                if alpha >= beta:
+                    break
+
+    if table is not None:
+        lower, upper = table.get(key, (-64, 64))
+        if best <= original_alpha:
+            table[key] = (lower, min(upper, best))
+        elif best >= beta:
+            table[key] = (max(lower, best), upper)
+        else:
+            table[key] = (best, best)
+
+    return best
+
+
+def solve_root(
+    player: int, opponent: int, deadline: float | None = None
+) -> tuple[int, int]:
+    """returns the square that gives the player to move the best final tile
+    difference and that difference, or -1 when the player has no valid moves.
+    raises SolveTimeout once the perf_counter deadline has passed"""
+
+    moves = legal_moves(player, opponent)
+    if not moves:
+        return (-1, player.bit_count() - opponent.bit_count())
+
+    table: dict[tuple[int, int], tuple[int, int]] = {}
+    alpha = -65
+    best_square = -1
+    for square in ordered_moves(player, opponent, moves):
+        flipped = flips(square, player, opponent)
+        value = -solve(
+            opponent ^ flipped,
+            player | flipped | (1 << square),
+            -64,
+            -alpha,
+            table,
+            deadline,
+        )
+        if value > alpha:
+            alpha, best_square = value, square
+
+    return (best_square, alpha)
+
+
+@symmetric_cache()
+def solve_position(player: int, opponent: int) -> tuple[int, int]:
+    """returns the square that gives the player to move the best final tile
+    difference and that difference, or -1 when the player has no valid moves"""
+
+    return solve_root(player, opponent)
+
+
+def solve_best_move(
+    board: Board, mark: str, deadline: float | None = None
+) -> tuple[int, int]:
+    """returns the square that gives the best final tile difference and that
+    difference, or -1 when the player has no valid moves. with a perf_counter
+    deadline the position is solved without the cache and SolveTimeout is
+    raised once the deadline has passed"""
+
+    player, opponent = board.discs[mark], board.discs[opponent_of(mark)]
+    if deadline is None:
+        return solve_position(player, opponent)
+
+    return solve_root(player, opponent, deadline)
@@ -0,0 +1,416 @@
+"""Bitboard engine shared by reversegam and the rg-sim simulators.
+
+Each side of the board is stored as a 64-bit integer where bit
+(row * 8 + column) is set when that player has a tile on the space.
+Legal moves and flips are computed with shift-and-mask operations on
+those integers instead of walking a list of lists one string at a time.
+Square indexes therefore run a1=0, b1=1, ... h1=7, a2=8, ... h8=63, which
+is the same row by row order get_allowed_moves has always returned."""
+
+import random
+
+COLUMNS = "abcdefgh"
+MARKS = ("X", "O")
+
+FULL = (1 << 64) - 1
+NOT_A_FILE = FULL & ~sum(1 << (row * 8) for row in range(8))
+NOT_H_FILE = FULL & ~sum(1 << (row * 8 + 7) for row in range(8))
+
+# (amount, mask) pairs for the four directions that increase the square index
+# (right, down, down-right, down-left) and the four that decrease it
+# (left, up, up-left, up-right). the mask drops tiles that wrapped around a side
+LEFT_SHIFTS = ((1, NOT_A_FILE), (8, FULL), (9, NOT_A_FILE), (7, NOT_H_FILE))
+RIGHT_SHIFTS = ((1, NOT_H_FILE), (8, FULL), (9, NOT_H_FILE), (7, NOT_A_FILE))
+
+
+def opponent_of(mark: str) -> str:
+    """returns the mark of the other player"""
+
+    return "X" if mark == "O" else "O"
+
+
+def to_square(coordinates: str) -> int:
+    """returns the square index of coordinates such as "a1" or "h8" """
+
+    column = COLUMNS.index(coordinates[0])
+    row = int(coordinates[1]) - 1
+
+    return row * 8 + column
+
+
+def to_coordinates(square: int) -> str:
+    """returns coordinates such as "a1" or "h8" of a square index"""
+
+    return COLUMNS[square % 8] + str(square // 8 + 1)
+
+
+def squares_of(bits: int) -> list[int]:
+    """returns the square indexes of the set bits in ascending order"""
+
+    squares = []
+    while bits:
+        lowest = bits & -bits
+        squares.append(lowest.bit_length() - 1)
+        bits ^= lowest
+
+    return squares
+
+
+def legal_moves(player: int, opponent: int) -> int:
+    """returns a bitboard of the empty spaces where the player flips tiles"""
+
+    empty = ~(player | opponent) & FULL
+    moves = 0
+
+    for amount, mask in LEFT_SHIFTS:
+        inner = opponent & mask
+        # run of opponent tiles next to the player's tiles (at most six long)
+        run = (player << amount) & inner
+        run |= (run << amount) & inner
+        run |= (run << amount) & inner
+        run |= (run << amount) & inner
+        run |= (run << amount) & inner
+        run |= (run << amount) & inner
+        moves |= (run << amount) & mask & empty
+
+    for amount, mask in RIGHT_SHIFTS:
+        inner = opponent & mask
+        run = (player >> amount) & inner
+        run |= (run >> amount) & inner
+        run |= (run >> amount) & inner
+        run |= (run >> amount) & inner
+        run |= (run >> amount) & inner
+        run |= (run >> amount) & inner
+        moves |= (run >> amount) & mask & empty
+
+    return moves
+
+
+def build_rays() -> tuple[tuple[tuple[int, ...], ...], ...]:
+    """returns for every square the bits of the spaces in each of the eight
+    directions, nearest first, leaving out rays too short to flip anything"""
+
+    directions = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, 1), (1, 1), (1, -1), (-1, -1)]
+
+    rays = []
+    for square in range(64):
+        row, column = divmod(square, 8)
+        square_rays = []
+        for row_step, column_step in directions:
+            ray = []
+            new_row, new_column = row + row_step, column + column_step
+            while 0 <= new_row < 8 and 0 <= new_column < 8:
+                ray.append(1 << (new_row * 8 + new_column))
+                new_row, new_column = new_row + row_step, new_column + column_step
+            # a flip needs an opponent tile followed by a player tile
+            if len(ray) >= 2:
+                square_rays.append(tuple(ray))
+        rays.append(tuple(square_rays))
+
+    return tuple(rays)
+
+
+RAYS = build_rays()
+
+
+def build_lines() -> tuple[tuple[int, int], ...]:
+    """returns for every square the bits of its eight neighbours and the bits
+    of every space in line with it, the spaces whose legality can change when
+    the square changes"""
+
+    lines = []
+    for square in range(64):
+        row, column = divmod(square, 8)
+        neighbours = 0
+        line = 0
+        for other in range(64):
+            other_row, other_column = divmod(other, 8)
+            row_step, column_step = other_row - row, other_column - column
+            if other == square:
+                continue
+            if max(abs(row_step), abs(column_step)) == 1:
+                neighbours |= 1 << other
+            if row_step == 0 or column_step == 0 or abs(row_step) == abs(column_step):
+                line |= 1 << other
+        lines.append((neighbours, line))
+
+    return tuple(lines)
+
+
+# (neighbours, spaces in line) of every square
+LINES = build_lines()
+# checking more spaces than this one by one is slower than legal_moves
+INCREMENTAL_SPACES = 12
+
+
+def frontier_of(discs: dict[str, int]) -> int:
+    """returns a bitboard of the empty spaces next to a tile"""
+
+    occupied = discs["X"] | discs["O"]
+    frontier = 0
+    for square in squares_of(occupied):
+        frontier |= LINES[square][0]
+
+    return frontier & ~occupied
+
+
+def flips(square: int, player: int, opponent: int) -> int:
+    """returns a bitboard of the opponent tiles flipped by playing on square"""
+
+    flipped = 0
+
+    for ray in RAYS[square]:
+        run = 0
+        for bit in ray:
+            if bit & opponent:
+                run |= bit
+                continue
+            # the run only flips when it is closed by one of the player's tiles
+            if bit & player:
+                flipped |= run
+            break
+
+    return flipped
+
+
+# random keys for Zobrist hashing, one per mark and square. the fixed seed
+# makes every process and every saved file agree on the hash of a position
+_zobrist_random = random.Random(20240101)
+ZOBRIST = {
+    mark: tuple(_zobrist_random.getrandbits(64) for _ in range(64)) for mark in MARKS
+}
+# turns an X tile on a square into an O tile and back
+FLIP_KEYS = tuple(ZOBRIST["X"][square] ^ ZOBRIST["O"][square] for square in range(64))
+# mixed in when O is the player to move
+SIDE_KEY = _zobrist_random.getrandbits(64)
+
+
+def zobrist_hash(discs: dict[str, int]) -> int:
+    """returns the Zobrist hash of the tiles on the board"""
+
+    key = 0
+    for mark in MARKS:
+        for square in squares_of(discs[mark]):
+            key ^= ZOBRIST[mark][square]
+
+    return key
+
+
+class Board:
+    """holds the tiles of both players as 64-bit integers keyed by mark
+    along with running tile counts, an incrementally updated Zobrist hash,
+    the frontier of empty spaces next to a tile and a stack of the moves
+    applied so far so they can be undone.
+
+    legal moves are remembered per mark with the number of moves applied
+    when they were worked out, so asking again about the same position, or
+    coming back to it with undo, does not scan the board. a mark is usually
+    asked about every other move, and only the frontier spaces in line with
+    a tile placed or flipped since then can have changed, so when there are
+    few of them only those are checked again"""
+
+    __slots__ = (
+        "discs",
+        "counts",
+        "hash",
+        "frontier",
+        "stack",
+        "moves",
+        "moves_carried",
+        "moves_scanned",
+    )
+
+    def __init__(self, discs: dict[str, int] | None = None):
+        self.discs = dict(discs) if discs else {"X": 0, "O": 0}
+        self.counts = {mark: bits.bit_count() for mark, bits in self.discs.items()}
+        self.hash = zobrist_hash(self.discs)
+        self.frontier = frontier_of(self.discs)
+        # (mark, square, flipped tiles, hash and frontier before the move)
+        # for every applied move
+        self.stack: list[tuple[str, int, int, int, int]] = []
+        # (number of moves applied, legal moves) of the marks asked about
+        self.moves: dict[str, tuple[int, int]] = {}
+        # how often legal moves were carried over from an earlier position
+        # and how often the board was scanned for them
+        self.moves_carried = 0
+        self.moves_scanned = 0
+
+    def copy(self) -> "Board":
+        """returns an independent copy of the board"""
+
+        return Board(self.discs)
+
+    def mark_at(self, row: int, column: int) -> str:
+        """returns the mark in the space or a blank"""
+
+        bit = 1 << (row * 8 + column)
+        if self.discs["X"] & bit:
+            return "X"
+        if self.discs["O"] & bit:
+            return "O"
+        return " "
+
+    def place(self, mark: str, row: int, column: int) -> None:
+        """puts a tile on the space without flipping anything"""
+
+        bit = 1 << (row * 8 + column)
+        opponent_mark = opponent_of(mark)
+        square = row * 8 + column
+        if self.discs[opponent_mark] & bit:
+            self.discs[opponent_mark] ^= bit
+            self.counts[opponent_mark] -= 1
+            self.hash ^= ZOBRIST[opponent_mark][square]
+        if not self.discs[mark] & bit:
+            self.discs[mark] |= bit
+            self.counts[mark] += 1
+            self.hash ^= ZOBRIST[mark][square]
+        self.frontier = (self.frontier | LINES[square][0]) & ~(
+            self.discs["X"] | self.discs["O"]
+        )
+        self.moves = {}
+
+    def flips_for(self, mark: str, square: int) -> int:
+        """returns the tiles playing on square would flip without changing the board"""
+
+        player = self.discs[mark]
+        opponent = self.discs[opponent_of(mark)]
+
+        if (player | opponent) & (1 << square):
+            return 0
+
+        return flips(square, player, opponent)
+
+    def is_legal(self, mark: str, square: int) -> bool:
+        """checks whether playing on square would flip anything"""
+
+        return self.flips_for(mark, square) != 0
+
+    def legal_moves(self, mark: str) -> int:
+        """returns a bitboard of the mark's legal moves, remembered until the
+        board changes and carried over from the last position the mark was
+        asked about when only a few spaces need checking again"""
+
+        ply = len(self.stack)
+        known = self.moves.get(mark)
+        if known is not None and known[0] == ply:
+            return known[1]
+
+        moves = None if known is None else self.updated_moves(mark, *known)
+        if moves is None:
+            moves = legal_moves(self.discs[mark], self.discs[opponent_of(mark)])
+            self.moves_scanned += 1
+        else:
+            self.moves_carried += 1
+        self.moves[mark] = (ply, moves)
+
+        return moves
+
+    def updated_moves(self, mark: str, ply: int, moves: int) -> int | None:
+        """returns the mark's legal moves given the ones after ply moves, or
+        None when scanning the board is quicker"""
+
+        # only spaces in line with a changed tile can change, and only the
+        # frontier can hold a legal move
+        stale = 0
+        for _, square, flipped, _, _ in self.stack[ply:]:
+            stale |= LINES[square][1]
+            while flipped:
+                lowest = flipped & -flipped
+                stale |= LINES[lowest.bit_length() - 1][1]
+                flipped ^= lowest
+            stale &= self.frontier
+            if stale.bit_count() > INCREMENTAL_SPACES:
+                return None
+
+        player = self.discs[mark]
+        opponent = self.discs[opponent_of(mark)]
+        moves &= ~(stale | player | opponent)
+        for space in squares_of(stale):
+            if flips(space, player, opponent):
+                moves |= 1 << space
+
+        return moves
+
+    def apply(self, mark: str, square: int) -> bool:
+        """plays on square and flips tiles if it's a valid move"""
+
+        flipped = self.flips_for(mark, square)
+        if not flipped:
+            return False
+
+        opponent_mark = opponent_of(mark)
+        flipped_count = flipped.bit_count()
+        self.discs[mark] |= flipped | (1 << square)
+        self.discs[opponent_mark] ^= flipped
+        self.counts[mark] += flipped_count + 1
+        self.counts[opponent_mark] -= flipped_count
+        self.stack.append((mark, square, flipped, self.hash, self.frontier))
+        self.frontier = (self.frontier | LINES[square][0]) & ~(
+            self.discs["X"] | self.discs["O"]
+        )
+
+        key = self.hash ^ ZOBRIST[mark][square]
+        while flipped:
+            lowest = flipped & -flipped
+            key ^= FLIP_KEYS[lowest.bit_length() - 1]
+            flipped ^= lowest
+        self.hash = key
+        return True
+
+    def undo(self) -> None:
+        """takes back the last applied move"""
+
+        mark, square, flipped, self.hash, self.frontier = self.stack.pop()
+        ply = len(self.stack)
+        for known_mark, (known_ply, _) in list(self.moves.items()):
+            # moves known after the undone move would be taken for another one
+            if known_ply > ply:
+                del self.moves[known_mark]
+        opponent_mark = opponent_of(mark)
+        flipped_count = flipped.bit_count()
+        self.discs[mark] &= ~(flipped | (1 << square))
+        self.discs[opponent_mark] |= flipped
+        self.counts[mark] -= flipped_count + 1
+        self.counts[opponent_mark] += flipped_count
+
+
+def starting_board() -> Board:
+    """returns a board with the four center tiles in place"""
+
+    board = Board()
+
+    centers = {"X": [[3, 3], [4, 4]], "O": [[3, 4], [4, 3]]}
+    for key, value in centers.items():
+        board.place(key, value[0][0], value[0][1])
+        board.place(key, value[1][0], value[1][1])
+
+    return board
+
+
+def get_scores(player_mark: str, opponent_mark: str, board: Board) -> tuple[int, int]:
+    """returns scores"""
+
+    return (board.counts[player_mark], board.counts[opponent_mark])
+
+
+def valid_move(player_mark: str, coordinates: str, board: Board) -> bool:
+    """confirms whether selected position is a valid move and flips necessary tiles"""
+
+    if len(coordinates) == 2:
+        return board.apply(player_mark, to_square(coordinates))
+
+    return False
+
+
+def get_allowed_moves(player_mark: str, board: Board) -> list[str]:
+    """returns list of coordinates that are allowed moves for the player"""
+
+    return [
+        to_coordinates(square) for square in squares_of(board.legal_moves(player_mark))
+    ]
+
+
+def position_key(board: Board, player_mark: str) -> int:
+    """returns the hash of the board with the player to move mixed in"""
+
+    return (board.hash ^ SIDE_KEY) if player_mark == "O" else board.hash
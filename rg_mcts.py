@@ -0,0 +1,229 @@
+"""Monte Carlo Tree Search (UCT) player for reversegam.
+
+Every iteration walks down the tree picking the child with the best upper
+confidence bound, adds the children of the position it reaches, plays the
+game out with random moves straight on the bitboards and credits the result
+to every node on the way back up. The tree is stored in flat arrays indexed
+by node number (the children of a node sit next to each other), so a node
+costs a few array slots instead of a board. After the player and the
+opponent have both moved, the node of the new position becomes the root and
+its statistics are kept for the next search."""
+
+import math
+import random
+import time
+from array import array
+
+from rg_book import book_move
+from rg_engine import (
+    Board,
+    flips,
+    legal_moves,
+    opponent_of,
+    squares_of,
+)
+
+PLAYOUTS = 1000
+EXPLORATION = 1.4
+TREE_CAPACITY = 500_000
+
+
+def playout(player: int, opponent: int) -> float:
+    """plays random moves until the player to move is stuck and returns 1,
+    0.5 or 0 as the player who was to move at the start won, tied or lost"""
+
+    turn = 0
+    while True:
+        moves = legal_moves(player, opponent)
+        if not moves:
+            break
+        square = random.choice(squares_of(moves))
+        flipped = flips(square, player, opponent)
+        player, opponent = opponent ^ flipped, player | flipped | (1 << square)
+        turn ^= 1
+
+    # player holds the tiles of whoever is to move now
+    difference = player.bit_count() - opponent.bit_count()
+    if turn:
+        difference = -difference
+
+    return 1.0 if difference > 0 else 0.5 if difference == 0 else 0.0
+
+
+class MonteCarloTree:
+    """search tree kept in parallel arrays indexed by node number"""
+
+    def __init__(self, capacity: int = TREE_CAPACITY, exploration: float = EXPLORATION):
+        self.capacity = capacity
+        self.exploration = exploration
+        self.reset()
+
+    def reset(self) -> None:
+        """drops every node"""
+
+        self.parent = array("i")
+        # children are stored next to each other from first_child onwards,
+        # a first_child of -1 means the node has not been expanded yet
+        self.first_child = array("i")
+        self.child_count = array("B")
+        self.move = array("b")
+        self.visits = array("I")
+        # results from the point of view of the player who made the move
+        self.wins = array("d")
+
+        self.root = -1
+        self.root_discs: dict[str, int] = {}
+        self.root_mark = ""
+        self.root_ply = -1
+
+    def add_node(self, parent: int, move: int) -> int:
+        """appends a node and returns its number"""
+
+        self.parent.append(parent)
+        self.first_child.append(-1)
+        self.child_count.append(0)
+        self.move.append(move)
+        self.visits.append(0)
+        self.wins.append(0.0)
+
+        return len(self.move) - 1
+
+    def expand(self, node: int, moves: int) -> None:
+        """adds a child for every legal move of the node's position"""
+
+        squares = squares_of(moves)
+        self.first_child[node] = len(self.move)
+        self.child_count[node] = len(squares)
+        for square in squares:
+            self.add_node(node, square)
+
+    def select_child(self, node: int) -> int:
+        """returns the child with the highest upper confidence bound"""
+
+        first = self.first_child[node]
+        log_visits = math.log(self.visits[node] or 1)
+
+        best_child, best_bound = first, -1.0
+        for child in range(first, first + self.child_count[node]):
+            visits = self.visits[child]
+            # every child is tried once before any is tried twice
+            if not visits:
+                return child
+            bound = self.wins[child] / visits + self.exploration * math.sqrt(
+                log_visits / visits
+            )
+            if bound > best_bound:
+                best_child, best_bound = child, bound
+
+        return best_child
+
+    def find_root(self, board: Board, mark: str) -> None:
+        """moves the root to the current position when it is two moves below
+        the old root, otherwise starts a new tree"""
+
+        reusable = self.root >= 0 and len(self.move) < self.capacity
+        if reusable and len(board.stack) == self.root_ply + 2:
+            for child in self.children(self.root):
+                for grandchild in self.children(child):
+                    position = Board(self.root_discs)
+                    position.apply(self.root_mark, self.move[child])
+                    position.apply(opponent_of(self.root_mark), self.move[grandchild])
+                    if position.discs == board.discs:
+                        self.root = grandchild
+                        self.set_root_position(board, mark)
+                        return
+
+        self.reset()
+        self.root = self.add_node(-1, -1)
+        self.set_root_position(board, mark)
+
+    def set_root_position(self, board: Board, mark: str) -> None:
+        """remembers the position the root stands for"""
+
+        self.root_discs = dict(board.discs)
+        self.root_mark = mark
+        self.root_ply = len(board.stack)
+
+    def children(self, node: int) -> range:
+        """returns the numbers of the node's children"""
+
+        first = self.first_child[node]
+        if first < 0:
+            return range(0)
+
+        return range(first, first + self.child_count[node])
+
+    def iterate(self) -> None:
+        """runs one selection, expansion, playout and backup"""
+
+        node = self.root
+        mark = self.root_mark
+        player = self.root_discs[mark]
+        opponent = self.root_discs[opponent_of(mark)]
+
+        # walk down through expanded nodes, player is always the one to move
+        while self.first_child[node] >= 0 and self.child_count[node]:
+            node = self.select_child(node)
+            square = self.move[node]
+            flipped = flips(square, player, opponent)
+            player, opponent = opponent ^ flipped, player | flipped | (1 << square)
+
+        if self.first_child[node] < 0:
+            moves = legal_moves(player, opponent)
+            self.expand(node, moves)
+            if moves:
+                node = self.select_child(node)
+                square = self.move[node]
+                flipped = flips(square, player, opponent)
+                player, opponent = opponent ^ flipped, player | flipped | (1 << square)
+
+        # result for the player to move, the node's mover is the other one
+        result = 1.0 - playout(player, opponent)
+        while node >= 0:
+            self.visits[node] += 1
+            self.wins[node] += result
+            result = 1.0 - result
+            if node == self.root:
+                break
+            node = self.parent[node]
+
+    def best_move(
+        self,
+        board: Board,
+        mark: str,
+        playouts: int | None = PLAYOUTS,
+        time_budget: float | None = None,
+    ) -> int:
+        """searches until the playout count or the time budget is used up and
+        returns the most visited move"""
+
+        self.find_root(board, mark)
+        deadline = time.perf_counter() + time_budget if time_budget else None
+
+        played = 0
+        while True:
+            if playouts is not None and played >= playouts:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            self.iterate()
+            played += 1
+
+        return self.move[
+            max(self.children(self.root), key=lambda child: self.visits[child])
+        ]
+
+
+# one tree per mark so two MCTS players in a simulation do not share
+TREES = {"X": MonteCarloTree(), "O": MonteCarloTree()}
+
+
+def mcts_square(board: Board, player_mark: str) -> int:
+    """returns the opening book move if there is one, otherwise the most
+    explored move after PLAYOUTS random games through the search tree"""
+
+    square = book_move(board, player_mark)
+    if square is None:
+        square = TREES[player_mark].best_move(board, player_mark, PLAYOUTS)
+
+    return square
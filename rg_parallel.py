@@ -0,0 +1,113 @@
+"""Root-parallel search that spreads one move decision over every CPU core.
+
+The moves of the root position are dealt out round-robin to worker
+processes. Each worker deepens the search over its own moves one move at a
+time, with the search it keeps between decisions and a transposition table
+in shared memory that every worker reads and writes, until a deadline
+shared by all of them. A worker reports the best of its moves after every
+finished iteration, and the decision takes the best move at the deepest
+iteration every worker finished, so only values searched to the same depth
+are compared. More cores mean fewer moves per worker and so deeper
+iterations within the same budget.
+
+The pool is started on the first decision and kept for the rest of the game,
+so later moves do not pay for starting processes. On a single core the
+search runs in this process instead. Once few squares are empty the endgame
+solver first gets SOLVE_SHARE of the budget in this process, and the workers
+only search when it does not finish in time."""
+
+import atexit
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+
+from rg_engine import Board, legal_moves, opponent_of, squares_of
+from rg_search import SEARCH, SOLVE_SHARE, shared_search_pool
+
+# the deadline is lowered by this many seconds so the results arrive in time
+COLLECT_SECONDS = 0.05
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def pool(workers: int) -> ProcessPoolExecutor:
+    """returns the process pool, starting it on first use"""
+
+    global _pool
+    if _pool is None:
+        # the workers share one transposition table, removed at exit after
+        # the pool has stopped
+        stack = ExitStack()
+        atexit.register(stack.close)
+        _pool = shared_search_pool(stack, workers)
+
+    return _pool
+
+
+def deal_moves(moves: int, workers: int) -> list[int]:
+    """returns the moves split round-robin into at most workers bitboards"""
+
+    shares = [0] * min(workers, moves.bit_count())
+    for number, square in enumerate(squares_of(moves)):
+        shares[number % len(shares)] |= 1 << square
+
+    return shares
+
+
+def search_share(
+    discs: dict[str, int], mark: str, moves: int, remaining: float
+) -> list[tuple[int, int, int]]:
+    """searches the moves until remaining seconds from now and returns the
+    depth, best square and value of every finished iteration"""
+
+    return SEARCH.deepen(Board(discs), mark, time.perf_counter() + remaining, moves)
+
+
+def combine(shares: list[list[tuple[int, int, int]]]) -> tuple[int, int, int] | None:
+    """returns the best square, its value and the depth of the deepest
+    iteration every share finished, or None when one of them finished none"""
+
+    depth = min(len(iterations) for iterations in shares)
+    if depth == 0:
+        return None
+
+    _, square, value = max(
+        (iterations[depth - 1] for iterations in shares), key=lambda result: result[2]
+    )
+
+    return (square, value, depth)
+
+
+def parallel_best_move(
+    board: Board, mark: str, budget: float, workers: int | None = None
+) -> tuple[int, int, int]:
+    """searches for budget seconds on all cores and returns the best square,
+    its value and the depth it was searched to"""
+
+    workers = workers or os.cpu_count() or 1
+    empties = 64 - board.counts["X"] - board.counts["O"]
+    moves = legal_moves(board.discs[mark], board.discs[opponent_of(mark)])
+    if workers == 1 or moves.bit_count() < 2:
+        return SEARCH.timed_best_move(board, mark, budget)
+
+    started = time.monotonic()
+    # the endgame solver runs here first, and the workers search with what
+    # is left of the budget when it does not finish in time
+    solved = SEARCH.solved_move(board, mark, time.perf_counter() + budget * SOLVE_SHARE)
+    if solved is not None:
+        return (*solved, empties)
+
+    deadline = started + budget - COLLECT_SECONDS
+    futures = [
+        pool(workers).submit(
+            search_share, board.discs, mark, share, deadline - time.monotonic()
+        )
+        for share in deal_moves(moves, workers)
+    ]
+    result = combine([future.result() for future in futures])
+    if result is None:
+        # the budget ran out before every worker finished its first iteration
+        return (squares_of(moves)[0], 0, 0)
+
+    return result
@@ -0,0 +1,264 @@
+"""Pattern-table evaluation of reversegam positions.
+
+The board is read as a set of patterns: the four edges, the 3x3 region of
+each corner and every row, column and diagonal long enough to hold a move.
+The spaces of a pattern are read as a base-3 number (0 empty, 1 X, 2 O) and
+that number indexes a table worked out once at import with the value of the
+pattern for X:
+
+- edges: tiles that can never be flipped, counted from an occupied corner
+- corners: the corner itself and the risky spaces next to an empty corner
+- lines: the moves each player has along the line, as a measure of mobility
+
+The value of a position is the sum of its pattern values plus the tile
+difference. A move changes only the patterns through the placed and flipped
+tiles, so Patterns keeps the indexes of a position and works out the value
+after a move from those few patterns instead of reading the whole board.
+apply and undo keep it in step with a board while a search plays moves and
+takes them back, so every position of the search is valued without a scan."""
+
+from itertools import product
+
+from rg_engine import Board, MARKS
+
+# the value of a space's state in a pattern index
+EMPTY, X_TILE, O_TILE = 0, 1, 2
+STATES = {"X": X_TILE, "O": O_TILE}
+
+CORNER_WEIGHT = 25
+# taking a space next to an empty corner hands the corner to the opponent
+X_SQUARE_WEIGHT = -12
+C_SQUARE_WEIGHT = -4
+STABLE_WEIGHT = 8
+MOBILITY_WEIGHT = 1
+DISC_WEIGHT = 2
+
+
+def square_of(row: int, column: int) -> int:
+    """returns the square index of a space"""
+
+    return row * 8 + column
+
+
+def build_patterns() -> tuple[tuple[tuple[int, ...], ...], ...]:
+    """returns the squares of the edges, the lines and the corner regions,
+    each in the order its index reads them"""
+
+    edges = (
+        tuple(square_of(0, column) for column in range(8)),
+        tuple(square_of(7, column) for column in range(8)),
+        tuple(square_of(row, 0) for row in range(8)),
+        tuple(square_of(row, 7) for row in range(8)),
+    )
+
+    lines = [
+        tuple(square_of(row, column) for column in range(8)) for row in range(1, 7)
+    ]
+    lines += [
+        tuple(square_of(row, column) for row in range(8)) for column in range(1, 7)
+    ]
+    for start in range(-5, 6):
+        # diagonals going down-right and down-left, three spaces long or more
+        lines.append(
+            tuple(
+                square_of(row, row - start) for row in range(8) if 0 <= row - start < 8
+            )
+        )
+        lines.append(
+            tuple(
+                square_of(row, 7 - row + start)
+                for row in range(8)
+                if 0 <= 7 - row + start < 8
+            )
+        )
+
+    corners = tuple(
+        tuple(
+            square_of(corner_row + row * row_step, corner_column + column * column_step)
+            for row in range(3)
+            for column in range(3)
+        )
+        for corner_row, row_step in ((0, 1), (7, -1))
+        for corner_column, column_step in ((0, 1), (7, -1))
+    )
+
+    return (edges, tuple(lines), corners)
+
+
+EDGES, LINES, CORNERS = build_patterns()
+
+
+def sign_of(state: int) -> int:
+    """returns 1 for an X tile, -1 for an O tile and 0 for an empty space"""
+
+    return (0, 1, -1)[state]
+
+
+def line_mobility(states: tuple[int, ...]) -> int:
+    """returns how many more moves X has than O along the line"""
+
+    mobility = 0
+    for space, state in enumerate(states):
+        if state != EMPTY:
+            continue
+        for player, opponent in ((X_TILE, O_TILE), (O_TILE, X_TILE)):
+            for step in (-1, 1):
+                other = space + step
+                while 0 <= other < len(states) and states[other] == opponent:
+                    other += step
+                # a move needs opponent tiles closed by one of the player's
+                if (
+                    other != space + step
+                    and 0 <= other < len(states)
+                    and states[other] == player
+                ):
+                    mobility += 1 if player == X_TILE else -1
+                    break
+
+    return mobility
+
+
+def line_value(states: tuple[int, ...]) -> int:
+    """returns the value of a row, column or diagonal for X"""
+
+    return MOBILITY_WEIGHT * line_mobility(states)
+
+
+def edge_value(states: tuple[int, ...]) -> int:
+    """returns the value of an edge for X"""
+
+    # a full edge cannot change any more, otherwise the tiles in a run of one
+    # colour starting at a corner are safe
+    if EMPTY not in states:
+        stable = set(range(len(states)))
+    else:
+        stable = set()
+        for order in (range(len(states)), range(len(states) - 1, -1, -1)):
+            corner_state = states[order[0]]
+            for space in order:
+                if corner_state == EMPTY or states[space] != corner_state:
+                    break
+                stable.add(space)
+
+    stable_value = sum(sign_of(states[space]) for space in stable)
+
+    return line_value(states) + STABLE_WEIGHT * stable_value
+
+
+def corner_value(states: tuple[int, ...]) -> int:
+    """returns the value of a corner region for X, read row by row from the
+    corner"""
+
+    corner, c_square, _, other_c_square, x_square = states[:5]
+    if corner != EMPTY:
+        return CORNER_WEIGHT * sign_of(corner)
+
+    return X_SQUARE_WEIGHT * sign_of(x_square) + C_SQUARE_WEIGHT * (
+        sign_of(c_square) + sign_of(other_c_square)
+    )
+
+
+def build_table(length: int, value) -> list[int]:
+    """returns the value of every pattern of length spaces by its index"""
+
+    # product counts in base 3 with the first space as the highest digit,
+    # while an index has the first space as the lowest digit
+    return [
+        value(states[::-1])
+        for states in product((EMPTY, X_TILE, O_TILE), repeat=length)
+    ]
+
+
+EDGE_TABLE = build_table(8, edge_value)
+CORNER_TABLE = build_table(9, corner_value)
+# lines of the same length share a table
+LINE_TABLES = {length: build_table(length, line_value) for length in range(3, 9)}
+
+# (squares, table) of every pattern
+PATTERNS = (
+    tuple((edge, EDGE_TABLE) for edge in EDGES)
+    + tuple((line, LINE_TABLES[len(line)]) for line in LINES)
+    + tuple((corner, CORNER_TABLE) for corner in CORNERS)
+)
+# (pattern number, power of 3) of every pattern a square is in
+SQUARE_PATTERNS = tuple(
+    tuple(
+        (number, 3 ** squares.index(square))
+        for number, (squares, _) in enumerate(PATTERNS)
+        if square in squares
+    )
+    for square in range(64)
+)
+
+
+class Patterns:
+    """the pattern indexes of a position and its value for X"""
+
+    def __init__(self, board: Board):
+        self.indexes = [0] * len(PATTERNS)
+        for mark in MARKS:
+            state = STATES[mark]
+            bits = board.discs[mark]
+            while bits:
+                lowest = bits & -bits
+                for number, power in SQUARE_PATTERNS[lowest.bit_length() - 1]:
+                    self.indexes[number] += state * power
+                bits ^= lowest
+
+        self.value = DISC_WEIGHT * (board.counts["X"] - board.counts["O"]) + sum(
+            table[index] for (_, table), index in zip(PATTERNS, self.indexes)
+        )
+        # (index changes, value before) of every applied move
+        self.stack: list[tuple[dict[int, int], int]] = []
+
+    def changes(self, mark: str, square: int, flipped: int) -> dict[int, int]:
+        """returns how much the move changes the index of every pattern it
+        touches"""
+
+        changes: dict[int, int] = {}
+        for number, power in SQUARE_PATTERNS[square]:
+            changes[number] = changes.get(number, 0) + STATES[mark] * power
+
+        # a flip turns 2 into 1 for X and 1 into 2 for O
+        step = -1 if mark == "X" else 1
+        while flipped:
+            lowest = flipped & -flipped
+            for number, power in SQUARE_PATTERNS[lowest.bit_length() - 1]:
+                changes[number] = changes.get(number, 0) + step * power
+            flipped ^= lowest
+
+        return changes
+
+    def changed_value(self, mark: str, flipped: int, changes: dict[int, int]) -> int:
+        """returns the value for X after a move of mark flipping flipped that
+        changes the pattern indexes by changes"""
+
+        discs = flipped.bit_count() * 2 + 1
+        value = self.value + DISC_WEIGHT * (discs if mark == "X" else -discs)
+        for number, change in changes.items():
+            table = PATTERNS[number][1]
+            index = self.indexes[number]
+            value += table[index + change] - table[index]
+
+        return value
+
+    def value_after(self, mark: str, square: int, flipped: int) -> int:
+        """returns the value for X after the move without making it"""
+
+        return self.changed_value(mark, flipped, self.changes(mark, square, flipped))
+
+    def apply(self, mark: str, square: int, flipped: int) -> None:
+        """updates the indexes and the value with the move"""
+
+        changes = self.changes(mark, square, flipped)
+        self.stack.append((changes, self.value))
+        self.value = self.changed_value(mark, flipped, changes)
+        for number, change in changes.items():
+            self.indexes[number] += change
+
+    def undo(self) -> None:
+        """takes back the last applied move"""
+
+        changes, self.value = self.stack.pop()
+        for number, change in changes.items():
+            self.indexes[number] -= change
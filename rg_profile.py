@@ -0,0 +1,163 @@
+"""Opt-in profiling of the strategies the rg-sim simulators play.
+
+MoveProfiler stands in for get_allowed_moves and chosen_algorithm. For every
+move it measures the wall time of the strategy, the time spent generating
+the allowed moves before it, how many boards the strategy tried (every call
+to Board.apply other than the move itself) and, when asked to trace
+allocations, the peak memory the move allocated. tracemalloc slows every
+allocation down many times over, so the times of a traced run only compare
+with each other and memory is best profiled in a run of its own. The numbers
+are summed per strategy and per game phase, so a long run keeps a fixed
+amount of data, and export writes them as JSON. Boards are only counted
+while the profiler is entered as a context manager, and nothing changes for
+runs without it. Searches that work on raw bitboards (the endgame solver and
+MCTS playouts) do not go through Board.apply, so their positions are not
+counted as boards."""
+
+import json
+import time
+import tracemalloc
+
+from rg_engine import Board, get_allowed_moves
+from rg_strategies import chosen_algorithm
+
+# a move is in the opening while more squares than this are empty
+OPENING_EMPTIES = 40
+# and in the endgame once this many squares or fewer are empty
+ENDGAME_EMPTIES = 14
+
+FIELDS = (
+    "moves",
+    "seconds",
+    "max_seconds",
+    "generation_seconds",
+    "boards",
+    "allocated_bytes",
+    "max_allocated_bytes",
+)
+
+
+def phase_of(board: Board) -> str:
+    """returns the game phase of the board"""
+
+    empties = 64 - board.counts["X"] - board.counts["O"]
+    if empties > OPENING_EMPTIES:
+        return "opening"
+    if empties > ENDGAME_EMPTIES:
+        return "midgame"
+
+    return "endgame"
+
+
+class MoveProfiler:
+    """collects per strategy and per phase totals of the moves it plays"""
+
+    def __init__(self, trace_allocations: bool = False):
+        self.trace_allocations = trace_allocations
+        # strategy -> phase -> field -> total
+        self.totals: dict[str, dict[str, dict[str, float]]] = {}
+        # seconds the last move generation of each mark took
+        self.generation = {"X": 0.0, "O": 0.0}
+        self.applied = 0
+        self.original_apply = Board.apply
+
+    def __enter__(self) -> "MoveProfiler":
+        original_apply = self.original_apply
+
+        def counting_apply(board: Board, mark: str, square: int) -> bool:
+            self.applied += 1
+            return original_apply(board, mark, square)
+
+        Board.apply = counting_apply  # type: ignore[method-assign]
+        if self.trace_allocations:
+            tracemalloc.start()
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        Board.apply = self.original_apply  # type: ignore[method-assign]
+        if self.trace_allocations:
+            tracemalloc.stop()
+
+    def allowed_moves(self, player_mark: str, board: Board) -> list[str]:
+        """get_allowed_moves that remembers how long it took"""
+
+        started = time.perf_counter()
+        allowed_moves = get_allowed_moves(player_mark, board)
+        self.generation[player_mark] = time.perf_counter() - started
+
+        return allowed_moves
+
+    def play(
+        self, algorithm: str, player_mark: str, allowed_moves: list[str], board: Board
+    ) -> None:
+        """chosen_algorithm that measures the move"""
+
+        phase = phase_of(board)
+        applied = self.applied
+        memory_before = 0
+        if self.trace_allocations:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+
+        started = time.perf_counter()
+        chosen_algorithm(algorithm, player_mark, allowed_moves, board)
+        seconds = time.perf_counter() - started
+
+        allocated = 0
+        if self.trace_allocations:
+            allocated = max(0, tracemalloc.get_traced_memory()[1] - memory_before)
+
+        totals = self.totals.setdefault(algorithm, {}).setdefault(
+            phase, dict.fromkeys(FIELDS, 0.0)
+        )
+        totals["moves"] += 1
+        totals["seconds"] += seconds
+        totals["max_seconds"] = max(totals["max_seconds"], seconds)
+        totals["generation_seconds"] += self.generation[player_mark]
+        # the move that was played is not a tried board
+        totals["boards"] += max(0, self.applied - applied - 1)
+        totals["allocated_bytes"] += allocated
+        totals["max_allocated_bytes"] = max(totals["max_allocated_bytes"], allocated)
+        self.generation[player_mark] = 0.0
+
+    def summary(self) -> dict[str, dict]:
+        """returns per strategy the totals of every phase and of the whole
+        game, with averages per move"""
+
+        summary = {}
+        for algorithm, phases in sorted(self.totals.items()):
+            game = dict.fromkeys(FIELDS, 0.0)
+            for totals in phases.values():
+                for field in FIELDS:
+                    if field.startswith("max_"):
+                        game[field] = max(game[field], totals[field])
+                    else:
+                        game[field] += totals[field]
+
+            summary[algorithm] = {
+                phase: averaged(totals)
+                for phase, totals in [("game", game), *sorted(phases.items())]
+            }
+
+        return summary
+
+    def export(self, path: str) -> None:
+        """writes the summary to path as JSON"""
+
+        with open(path, "w") as profile_file:
+            json.dump(self.summary(), profile_file, indent=2)
+
+
+def averaged(totals: dict[str, float]) -> dict[str, float]:
+    """returns the totals with per move averages added"""
+
+    moves = totals["moves"] or 1
+
+    return {
+        **totals,
+        "seconds_per_move": totals["seconds"] / moves,
+        "generation_seconds_per_move": totals["generation_seconds"] / moves,
+        "boards_per_move": totals["boards"] / moves,
+        "allocated_bytes_per_move": totals["allocated_bytes"] / moves,
+    }
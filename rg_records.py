@@ -0,0 +1,185 @@
+"""Compact binary records of simulated reversegam games.
+
+Every game becomes one record: a fixed header with the game's seed, the two
+strategy identifiers, the final tiles of X and O and the number of moves,
+followed by one byte per move holding its square (row * 8 + column). There
+are no passes in these games, so the moves alternate between X and O from
+the start and the whole game can be replayed from the record.
+
+RecordWriter appends records to a file through a buffer. Whenever the buffer
+holds FRAME_SIZE bytes it is written out as one frame, compressed with zlib
+or lzma when the file was created with compression, so a frame can be read
+back on its own and a file can be extended by later runs. read_records
+streams the records back one frame at a time, so files larger than memory
+can be read."""
+
+import lzma
+import struct
+import zlib
+from collections.abc import Iterator
+from typing import NamedTuple
+
+MAGIC = b"RGGR"
+VERSION = 1
+# compression byte of the file header -> name
+COMPRESSIONS = {0: "none", 1: "zlib", 2: "lzma"}
+# magic, version, compression
+FILE_HEADER = struct.Struct("<4sBB")
+# stored length, length before compression
+FRAME_HEADER = struct.Struct("<II")
+# seed, first strategy, second strategy, X tiles, O tiles, number of moves
+RECORD = struct.Struct("<QBBBBB")
+FRAME_SIZE = 1 << 20
+
+
+class GameRecord(NamedTuple):
+    """one decoded game, ai1 played X and ai2 played O"""
+
+    seed: int
+    ai1: str
+    ai2: str
+    x_score: int
+    o_score: int
+    # the square of every move in order, X moving first
+    moves: bytes
+
+
+def encode_game(
+    ai1: str, ai2: str, seed: int, squares: list[int], scores: tuple[int, int]
+) -> bytes:
+    """returns the record of a game ai1 played as X against ai2 as O, given
+    the squares played in order and the final (X, O) tiles"""
+
+    x_score, o_score = scores
+
+    return RECORD.pack(
+        seed, int(ai1), int(ai2), x_score, o_score, len(squares)
+    ) + bytes(squares)
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    """returns the frame payload of data"""
+
+    match compression:
+        case "zlib":
+            return zlib.compress(data)
+        case "lzma":
+            return lzma.compress(data)
+        case _:
+            return data
+
+
+def decompress(payload: bytes, compression: str) -> bytes:
+    """returns the records stored in a frame payload"""
+
+    match compression:
+        case "zlib":
+            return zlib.decompress(payload)
+        case "lzma":
+            return lzma.decompress(payload)
+        case _:
+            return payload
+
+
+def read_frames(path: str) -> Iterator[bytes]:
+    """yields the records of each frame of the file, decompressed"""
+
+    with open(path, "rb") as record_file:
+        header = record_file.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size:
+            raise ValueError(f"{path} is not a version {VERSION} record file")
+        magic, version, code = FILE_HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or code not in COMPRESSIONS:
+            raise ValueError(f"{path} is not a version {VERSION} record file")
+
+        while frame_header := record_file.read(FRAME_HEADER.size):
+            if len(frame_header) < FRAME_HEADER.size:
+                raise ValueError(f"{path} ends in the middle of a frame")
+            stored, size = FRAME_HEADER.unpack(frame_header)
+            payload = record_file.read(stored)
+            if len(payload) < stored:
+                raise ValueError(f"{path} ends in the middle of a frame")
+            records = decompress(payload, COMPRESSIONS[code])
+            if len(records) != size:
+                raise ValueError(f"{path} has a damaged frame")
+            yield records
+
+
+def read_records(path: str) -> Iterator[GameRecord]:
+    """yields the games of a record file in the order they were written"""
+
+    for records in read_frames(path):
+        offset = 0
+        while offset < len(records):
+            seed, ai1, ai2, x_score, o_score, count = RECORD.unpack_from(
+                records, offset
+            )
+            offset += RECORD.size
+            moves = records[offset : offset + count]
+            offset += count
+            yield GameRecord(seed, str(ai1), str(ai2), x_score, o_score, moves)
+
+
+class RecordWriter:
+    """buffered, append-only writer of game records"""
+
+    def __init__(
+        self, path: str, compression: str = "zlib", frame_size: int = FRAME_SIZE
+    ):
+        if compression not in COMPRESSIONS.values():
+            raise ValueError(f"unknown compression {compression!r}")
+
+        self.compression = compression
+        self.frame_size = frame_size
+        self.buffer = bytearray()
+        self.file = open(path, "ab")
+
+        # a new file gets a header, an old one must use the same compression
+        if self.file.tell() == 0:
+            code = next(
+                code for code, name in COMPRESSIONS.items() if name == compression
+            )
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION, code))
+        else:
+            with open(path, "rb") as record_file:
+                header = record_file.read(FILE_HEADER.size)
+            magic, version, code = FILE_HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                self.file.close()
+                raise ValueError(f"{path} is not a version {VERSION} record file")
+            if COMPRESSIONS.get(code) != compression:
+                self.file.close()
+                raise ValueError(f"{path} uses {COMPRESSIONS.get(code)} compression")
+
+    def write(self, records: bytes) -> None:
+        """buffers one or more records, writing a frame once the buffer is full"""
+
+        self.buffer += records
+        if len(self.buffer) >= self.frame_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """writes the buffered records as a frame and hands everything
+        written so far, the file header included, to the operating system"""
+
+        if self.buffer:
+            payload = compress(bytes(self.buffer), self.compression)
+            self.file.write(FRAME_HEADER.pack(len(payload), len(self.buffer)))
+            self.file.write(payload)
+            self.buffer.clear()
+        self.file.flush()
+
+    def close(self) -> None:
+        """writes what is left in the buffer and closes the file"""
+
+        if self.file.closed:
+            return
+
+        self.flush()
+        self.file.close()
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,190 @@
+"""Plays many reversegam games between two strategies, optionally spread over
+a pool of worker processes. Every game gets its own seed derived from a base
+seed and the game's index, so the totals only depend on the seeds and not on
+how the games were split between the workers. When a record writer is
+given, every game is also written out as a compact record, and when a move
+profiler is given the games are played in this process through it. A
+checkpoint keeps the progress of a run so it can be resumed."""
+
+import os
+import random
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import count, repeat
+
+from rg_checkpoint import Checkpoint
+from rg_engine import (
+    Board,
+    get_allowed_moves,
+    get_scores,
+    opponent_of,
+    starting_board,
+    valid_move,
+)
+from rg_profile import MoveProfiler
+from rg_records import RecordWriter, encode_game
+from rg_strategies import chosen_algorithm
+
+# most games a chunk holds when progress is checkpointed or shown
+CHUNK_GAMES = 1000
+
+
+def game_seeds(base_seed: int, runs: int) -> list[int]:
+    """returns the seed of each game of a run"""
+
+    return [base_seed + index for index in range(runs)]
+
+
+def play_full_game(
+    ai1: str,
+    ai2: str,
+    seed: int,
+    profiler: MoveProfiler | None = None,
+    opening_plies: int = 0,
+) -> Board:
+    """plays one game on a fresh board with ai1 as X and ai2 as O and returns
+    the final board, whose stack holds every move of the game. the first
+    opening_plies moves are random, so deterministic strategies can still
+    play different games"""
+
+    random.seed(seed)
+    board = starting_board()
+    players = {"X": ai1, "O": ai2}
+    mark = "X"
+    find_moves, play_move = get_allowed_moves, chosen_algorithm
+    if profiler is not None:
+        find_moves, play_move = profiler.allowed_moves, profiler.play
+
+    for ply in count():
+        allowed_moves = find_moves(mark, board)
+        if not allowed_moves:
+            break
+        if ply < opening_plies:
+            valid_move(mark, random.choice(allowed_moves), board)
+        else:
+            play_move(players[mark], mark, allowed_moves, board)
+        mark = opponent_of(mark)
+
+    return board
+
+
+def play_game(ai1: str, ai2: str, seed: int, opening_plies: int = 0) -> tuple[int, int]:
+    """plays one game with ai1 as X and ai2 as O from opening_plies random
+    moves and returns their scores"""
+
+    return get_scores(
+        "X", "O", play_full_game(ai1, ai2, seed, opening_plies=opening_plies)
+    )
+
+
+def play_games(
+    ai1: str,
+    ai2: str,
+    seeds: list[int],
+    record: bool = False,
+    profiler: MoveProfiler | None = None,
+) -> tuple[int, int, int, bytes]:
+    """plays one game per seed and returns ai1 wins, ai2 wins, ties and, when
+    record is set, the records of the games"""
+
+    ai1_wins, ai2_wins, ties = 0, 0, 0
+    records = bytearray()
+
+    for seed in seeds:
+        board = play_full_game(ai1, ai2, seed, profiler)
+        ai1_score, ai2_score = get_scores("X", "O", board)
+        if ai1_score > ai2_score:
+            ai1_wins += 1
+        elif ai1_score < ai2_score:
+            ai2_wins += 1
+        else:
+            ties += 1
+        if record:
+            squares = [square for _, square, _, _, _ in board.stack]
+            records += encode_game(ai1, ai2, seed, squares, (ai1_score, ai2_score))
+
+    return (ai1_wins, ai2_wins, ties, bytes(records))
+
+
+def split_seeds(seeds: list[int], chunks: int) -> list[list[int]]:
+    """splits seeds into at most chunks nearly equal lists"""
+
+    size = max(1, -(-len(seeds) // chunks))
+
+    return [seeds[start : start + size] for start in range(0, len(seeds), size)]
+
+
+def run_simulation(
+    ai1: str,
+    ai2: str,
+    runs: int,
+    seed: int = 0,
+    workers: int | None = None,
+    writer: RecordWriter | None = None,
+    profiler: MoveProfiler | None = None,
+    checkpoint: Checkpoint | None = None,
+    progress: Callable[[int], None] | None = None,
+) -> tuple[int, int, int]:
+    """plays runs games and returns ai1 wins, ai2 wins and ties merged over
+    the workers. with a single worker or a profiler the games are played in
+    this process. the records of the games go to writer, if any. with a
+    checkpoint the games it counted already are skipped and the progress is
+    saved to it now and then. progress is called with the number of games
+    done after every chunk"""
+
+    workers = workers or os.cpu_count() or 1
+    record = writer is not None
+
+    tallies = {"wins": 0, "ties": 0, "losses": 0}
+    completed = 0
+    if checkpoint is not None:
+        tallies = checkpoint.pairing(ai1, ai2)
+        completed = checkpoint.state["completed"]
+    seeds = game_seeds(seed, runs)[completed:]
+    if checkpoint is not None:
+        # a run that dies before the first interval can still be resumed
+        checkpoint.save(writer)
+
+    serial = workers == 1 or runs < 2 or profiler is not None
+    if checkpoint is None and progress is None and serial:
+        chunks = [seeds]
+    else:
+        # a few chunks per worker keeps them busy when some games run longer,
+        # and small enough chunks let progress be saved and shown every so often
+        chunks = split_seeds(seeds, max(workers * 4, -(-len(seeds) // CHUNK_GAMES)))
+
+    with ExitStack() as stack:
+        if serial:
+            results = map(
+                play_games,
+                repeat(ai1),
+                repeat(ai2),
+                chunks,
+                repeat(record),
+                repeat(profiler),
+            )
+        else:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            results = executor.map(
+                play_games, repeat(ai1), repeat(ai2), chunks, repeat(record)
+            )
+
+        for chunk, (wins1, wins2, tied, records) in zip(chunks, results):
+            tallies["wins"] += wins1
+            tallies["losses"] += wins2
+            tallies["ties"] += tied
+            completed += len(chunk)
+            if writer is not None:
+                writer.write(records)
+            if progress is not None:
+                progress(completed)
+            if checkpoint is not None:
+                checkpoint.state["completed"] = completed
+                checkpoint.state["next_seed"] = seed + completed
+                checkpoint.save_if_due(writer)
+
+    if checkpoint is not None:
+        checkpoint.save(writer)
+
+    return (tallies["wins"], tallies["losses"], tallies["ties"])
@@ -0,0 +1,513 @@
+"""Alpha-beta search player for reversegam.
+
+The search looks a fixed number of moves ahead with negamax and alpha-beta
+pruning, or deepens one move at a time until a wall-clock budget runs out.
+Positions are evaluated by tile difference, like the greedy players, or by
+the pattern tables of rg_patterns, kept in step with every move the search
+plays and takes back. A game that is over (the player to move has no valid
+moves) is scored by its tile difference far above any evaluation so the
+search always prefers a certain win. Results are kept
+in a transposition table keyed on the board's Zobrist hash so positions
+reached through different move orders are only searched once. Moves are
+tried best first: the stored move of the position (the best move of the
+previous iteration), then the killer moves that refuted other moves at the
+same depth, then by history score. Once few squares are empty the exact
+endgame solver takes over. The fixed-depth player searches every position
+with a fresh table, killers and history, so its move only depends on the
+position, and caches its results by symmetry class, so mirror images of a
+searched position are not searched again. Worker processes can search with
+one SharedTranspositionTable, a table of packed slots in shared memory that
+they all read and write."""
+
+import struct
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from multiprocessing import shared_memory
+
+from rg_book import book_move
+from rg_endgame import ENDGAME_EMPTIES, SolveTimeout, solve_best_move
+from rg_engine import (
+    Board,
+    legal_moves,
+    opponent_of,
+    position_key,
+    squares_of,
+)
+from rg_patterns import Patterns
+from rg_symmetry import symmetric_cache
+
+INFINITY = 1_000_000
+# a finished game is worth more than any tile difference mid-game
+GAME_OVER_WEIGHT = 1000
+
+# how a stored value relates to the real value of the position
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+SEARCH_DEPTH = 4
+KILLERS_PER_PLY = 2
+# how often the clock is read, as a mask on the node count
+TIME_CHECK_MASK = 255
+# slots of the transposition tables, as a power of two
+TABLE_BITS = 18
+# the fixed-depth player starts a small table for every move it searches
+FIXED_DEPTH_TABLE_BITS = 14
+# share of a timed move's budget the endgame solver may use before the
+# search takes over
+SOLVE_SHARE = 0.5
+# key xor data, data: see SharedTranspositionTable
+SHARED_SLOT = struct.Struct("<QQ")
+
+
+class SearchTimeout(Exception):
+    """raised inside the search when the time budget is used up"""
+
+
+class TranspositionTable:
+    """fixed number of slots indexed by the low bits of the position key.
+    a slot is overwritten when it holds the same position, was written by an
+    earlier search or was searched to a smaller depth, so deep results from
+    the current search survive"""
+
+    def __init__(self, size_bits: int = TABLE_BITS):
+        self.mask = (1 << size_bits) - 1
+        # (key, depth, value, flag, move, generation) or None
+        self.slots: list[tuple[int, int, int, int, int, int] | None]
+        self.slots = [None] * (1 << size_bits)
+        self.generation = 0
+
+    def new_search(self) -> None:
+        """marks the entries of earlier searches as replaceable"""
+
+        self.generation += 1
+
+    def probe(self, key: int) -> tuple[int, int, int, int] | None:
+        """returns depth, value, flag and best move stored for the position"""
+
+        entry = self.slots[key & self.mask]
+        if entry is None or entry[0] != key:
+            return None
+
+        return entry[1:5]
+
+    def store(self, key: int, depth: int, value: int, flag: int, move: int) -> None:
+        """saves a search result if the replacement policy allows it"""
+
+        index = key & self.mask
+        entry = self.slots[index]
+        if (
+            entry is None
+            or entry[0] == key
+            or entry[5] != self.generation
+            or entry[1] <= depth
+        ):
+            self.slots[index] = (key, depth, value, flag, move, self.generation)
+
+
+class SharedTranspositionTable:
+    """a TranspositionTable in shared memory that worker processes open by
+    name, so they all read and write the same slots without pickling.
+
+    a slot is two little-endian 64-bit words: the entry packed into one
+    word (value in the low 32 bits, then depth, flag, move + 1 and the low
+    byte of the generation) and the position key xor that word. there are no
+    locks: when two processes write a slot at once and the words get mixed
+    up, the key no longer matches and the slot reads as empty. the
+    generation is kept per process, so entries of other processes count as
+    replaceable"""
+
+    def __init__(self, size_bits: int = TABLE_BITS, name: str | None = None):
+        size = SHARED_SLOT.size << size_bits
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            # pool workers share the resource tracker of the process that
+            # made the table, which removes it when that process unlinks it
+            self.memory = shared_memory.SharedMemory(name=name)
+            # the size of the memory can be rounded up to whole pages
+            slots = self.memory.size // SHARED_SLOT.size
+            size_bits = slots.bit_length() - 1
+        # the slots are read and written through the buffer, which
+        # SharedMemory only drops once it is closed
+        buffer = self.memory.buf
+        if buffer is None:
+            raise ValueError(f"shared memory {self.memory.name} is closed")
+        self.buffer: memoryview = buffer
+        self.mask = (1 << size_bits) - 1
+        self.generation = 0
+
+    @property
+    def name(self) -> str:
+        """returns the name other processes open the table by"""
+
+        return self.memory.name
+
+    def new_search(self) -> None:
+        """marks the entries of earlier searches as replaceable"""
+
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key: int) -> tuple[int, int, int, int] | None:
+        """returns depth, value, flag and best move stored for the position"""
+
+        check, data = SHARED_SLOT.unpack_from(
+            self.buffer, (key & self.mask) * SHARED_SLOT.size
+        )
+        if not data or check ^ data != key:
+            return None
+
+        value = data & 0xFFFFFFFF
+        if value >= 1 << 31:
+            value -= 1 << 32
+
+        return (data >> 32 & 0xFF, value, data >> 40 & 0xFF, (data >> 48 & 0xFF) - 1)
+
+    def store(self, key: int, depth: int, value: int, flag: int, move: int) -> None:
+        """saves a search result if the replacement policy allows it"""
+
+        offset = (key & self.mask) * SHARED_SLOT.size
+        check, data = SHARED_SLOT.unpack_from(self.buffer, offset)
+        if (
+            data
+            and check ^ data != key
+            and data >> 56 == self.generation
+            and data >> 32 & 0xFF > depth
+        ):
+            return
+
+        data = (
+            (value & 0xFFFFFFFF)
+            | depth << 32
+            | flag << 40
+            | (move + 1) << 48
+            | self.generation << 56
+        )
+        SHARED_SLOT.pack_into(self.buffer, offset, key ^ data, data)
+
+    def close(self) -> None:
+        """lets go of the shared memory in this process"""
+
+        self.memory.close()
+
+
+@contextmanager
+def shared_table(size_bits: int = TABLE_BITS) -> Iterator[SharedTranspositionTable]:
+    """makes a shared table for the workers of a pool and removes it after"""
+
+    table = SharedTranspositionTable(size_bits)
+    try:
+        yield table
+    finally:
+        table.close()
+        table.memory.unlink()
+
+
+def attach_shared_table(name: str) -> None:
+    """makes SEARCH in a worker process use the shared table called name,
+    as the initializer of a process pool"""
+
+    SEARCH.table = SharedTranspositionTable(name=name)
+
+
+def shared_search_pool(stack: ExitStack, workers: int) -> ProcessPoolExecutor:
+    """returns a process pool whose workers search with one shared table.
+    closing stack stops the pool and then removes the table"""
+
+    table = stack.enter_context(shared_table())
+
+    return stack.enter_context(
+        ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=attach_shared_table,
+            initargs=(table.name,),
+        )
+    )
+
+
+def evaluate(player_mark: str, board: Board) -> int:
+    """returns the tile difference from the player's point of view"""
+
+    return board.counts[player_mark] - board.counts[opponent_of(player_mark)]
+
+
+class Search:
+    """negamax search with alpha-beta pruning over a transposition table"""
+
+    def __init__(
+        self,
+        table: TranspositionTable | SharedTranspositionTable | None = None,
+        endgame_empties: int = ENDGAME_EMPTIES,
+        patterns: bool = False,
+    ):
+        self.table: TranspositionTable | SharedTranspositionTable
+        self.table = table or TranspositionTable()
+        # positions with this many empty squares or fewer are solved exactly
+        self.endgame_empties = endgame_empties
+        # evaluate by pattern tables instead of tile difference
+        self.use_patterns = patterns
+        # the patterns of the position being searched, when used
+        self.patterns: Patterns | None = None
+        self.nodes = 0
+        self.deadline: float | None = None
+        # squares that caused a cutoff, per distance from the root
+        self.killers: list[list[int]] = [[] for _ in range(64)]
+        # how much each square has been worth playing, per mark
+        self.history = {"X": [0] * 64, "O": [0] * 64}
+
+    def evaluation(self, mark: str, board: Board) -> int:
+        """returns the value of a position that is not over for the player to
+        move, by pattern value when the search uses patterns"""
+
+        if self.patterns is None:
+            return evaluate(mark, board)
+
+        return self.patterns.value if mark == "X" else -self.patterns.value
+
+    def play(self, board: Board, mark: str, square: int) -> None:
+        """makes the move on the board and on the patterns"""
+
+        board.apply(mark, square)
+        if self.patterns is not None:
+            self.patterns.apply(mark, square, board.stack[-1][2])
+
+    def take_back(self, board: Board) -> None:
+        """takes back the last move on the board and on the patterns"""
+
+        board.undo()
+        if self.patterns is not None:
+            self.patterns.undo()
+
+    def negamax(
+        self, board: Board, mark: str, depth: int, alpha: int, beta: int, ply: int = 1
+    ) -> int:
+        """returns the value of the position for the player to move"""
+
+        self.nodes += 1
+        if (
+            self.deadline is not None
+            and not self.nodes & TIME_CHECK_MASK
+            and time.perf_counter() > self.deadline
+        ):
+            raise SearchTimeout
+        opponent_mark = opponent_of(mark)
+        moves = legal_moves(board.discs[mark], board.discs[opponent_mark])
+        if not moves:
+            return GAME_OVER_WEIGHT * evaluate(mark, board)
+        if depth == 0:
+            return self.evaluation(mark, board)
+
+        key = position_key(board, mark)
+        table_move = -1
+        entry = self.table.probe(key)
+        if entry is not None:
+            entry_depth, value, flag, table_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER_BOUND and value >= beta:
+                    return value
+                if flag == UPPER_BOUND and value <= alpha:
+                    return value
+
+        original_alpha = alpha
+        best_value, best_move = -INFINITY, -1
+        for square in self.ordered(mark, moves, table_move, ply):
+            self.play(board, mark, square)
+            value = -self.negamax(
+                board, opponent_mark, depth - 1, -beta, -alpha, ply + 1
+            )
+            self.take_back(board)
+
+            if value > best_value:
+                best_value, best_move = value, square
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                self.remember_cutoff(mark, square, depth, ply)
+                break
+
+        if best_value <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_value >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.table.store(key, depth, best_value, flag, best_move)
+
+        return best_value
+
+    def ordered(self, mark: str, moves: int, table_move: int, ply: int) -> list[int]:
+        """returns the squares of the moves, stored best move first, then the
+        killer moves, then the rest by history score"""
+
+        history = self.history[mark]
+        squares = sorted(squares_of(moves), key=lambda square: -history[square])
+
+        for square in reversed(self.killers[ply]):
+            if moves >> square & 1:
+                squares.remove(square)
+                squares.insert(0, square)
+        if table_move >= 0 and moves >> table_move & 1:
+            squares.remove(table_move)
+            squares.insert(0, table_move)
+
+        return squares
+
+    def remember_cutoff(self, mark: str, square: int, depth: int, ply: int) -> None:
+        """records a move that refuted the opponent's last move"""
+
+        self.history[mark][square] += depth * depth
+
+        killers = self.killers[ply]
+        if square not in killers:
+            killers.insert(0, square)
+            del killers[KILLERS_PER_PLY:]
+
+    def best_move(
+        self, board: Board, mark: str, depth: int, moves: int | None = None
+    ) -> tuple[int, int]:
+        """returns the square with the highest value and that value, or -1
+        when the player has no valid moves. given a bitboard of moves only
+        those are tried at the root"""
+
+        solved = self.solved_move(board, mark) if moves is None else None
+        if solved is not None:
+            return solved
+
+        self.table.new_search()
+        self.patterns = Patterns(board) if self.use_patterns else None
+        opponent_mark = opponent_of(mark)
+        all_moves = legal_moves(board.discs[mark], board.discs[opponent_mark])
+        if moves is None:
+            moves = all_moves
+        key = position_key(board, mark)
+        entry = self.table.probe(key)
+        table_move = entry[3] if entry is not None else -1
+
+        alpha = -INFINITY
+        best_value, best_square = -INFINITY, -1
+        for square in self.ordered(mark, moves, table_move, 0):
+            self.play(board, mark, square)
+            value = -self.negamax(board, opponent_mark, depth - 1, -INFINITY, -alpha)
+            self.take_back(board)
+
+            if value > best_value:
+                best_value, best_square = value, square
+                alpha = value
+
+        if moves == all_moves:
+            # the best of some of the moves is not the value of the position
+            self.table.store(key, depth, best_value, EXACT, best_square)
+
+        return (best_square, best_value)
+
+    def solved_move(
+        self, board: Board, mark: str, deadline: float | None = None
+    ) -> tuple[int, int] | None:
+        """returns the perfect-play square and its value once few enough
+        squares are empty for the endgame solver, otherwise None. None too
+        when the solver has not finished by the perf_counter deadline"""
+
+        if 64 - board.counts["X"] - board.counts["O"] > self.endgame_empties:
+            return None
+
+        try:
+            square, difference = solve_best_move(board, mark, deadline)
+        except SolveTimeout:
+            return None
+
+        return (square, GAME_OVER_WEIGHT * difference)
+
+    def deepen(
+        self, board: Board, mark: str, deadline: float, moves: int | None = None
+    ) -> list[tuple[int, int, int]]:
+        """deepens the search one move at a time until the perf_counter
+        deadline and returns the depth, best square and value of every
+        finished iteration. given a bitboard of moves only those are tried
+        at the root"""
+
+        empties = 64 - board.counts["X"] - board.counts["O"]
+        if moves is None:
+            # with every move given the iterations search instead of solving
+            moves = legal_moves(board.discs[mark], board.discs[opponent_of(mark)])
+        self.deadline = deadline
+        # older cutoffs say less about this position than recent ones
+        for history in self.history.values():
+            history[:] = [score // 2 for score in history]
+        moves_made = len(board.stack)
+
+        iterations = []
+        try:
+            for depth in range(1, empties + 1):
+                iterations.append((depth, *self.best_move(board, mark, depth, moves)))
+        except SearchTimeout:
+            # take back the moves the interrupted iteration was trying
+            while len(board.stack) > moves_made:
+                self.take_back(board)
+        finally:
+            self.deadline = None
+
+        return iterations
+
+    def timed_best_move(
+        self, board: Board, mark: str, budget: float
+    ) -> tuple[int, int, int]:
+        """deepens the search one move at a time until budget seconds have
+        passed and returns the best square of the deepest finished iteration,
+        its value and that depth. once few squares are empty the endgame
+        solver gets SOLVE_SHARE of the budget first, and its exact answer
+        counts as searched to the end of the game"""
+
+        started = time.perf_counter()
+        empties = 64 - board.counts["X"] - board.counts["O"]
+        solved = self.solved_move(board, mark, started + budget * SOLVE_SHARE)
+        if solved is not None:
+            return (*solved, empties)
+
+        iterations = self.deepen(board, mark, started + budget)
+        if not iterations:
+            moves = legal_moves(board.discs[mark], board.discs[opponent_of(mark)])
+            return (squares_of(moves)[0], 0, 0)
+
+        depth, best_square, best_value = iterations[-1]
+
+        return (best_square, best_value, depth)
+
+
+SEARCH = Search()
+
+
+@symmetric_cache()
+def searched_move(player: int, opponent: int) -> tuple[int, int]:
+    """returns the best square for the player to move SEARCH_DEPTH moves
+    ahead and its value"""
+
+    # what an earlier search learnt would change the move order and so which
+    # of two equal moves is found, making a game depend on the games before it
+    search = Search(TranspositionTable(FIXED_DEPTH_TABLE_BITS))
+
+    return search.best_move(Board({"X": player, "O": opponent}), "X", SEARCH_DEPTH)
+
+
+@symmetric_cache()
+def pattern_searched_move(player: int, opponent: int) -> tuple[int, int]:
+    """returns the best square for the player to move SEARCH_DEPTH moves
+    ahead by pattern value and its value"""
+
+    search = Search(TranspositionTable(FIXED_DEPTH_TABLE_BITS), patterns=True)
+
+    return search.best_move(Board({"X": player, "O": opponent}), "X", SEARCH_DEPTH)
+
+
+def alpha_beta_square(board: Board, player_mark: str, patterns: bool = False) -> int:
+    """returns the opening book move if there is one, otherwise the best move
+    found searching SEARCH_DEPTH moves ahead, by pattern value if asked to"""
+
+    square = book_move(board, player_mark)
+    if square is None:
+        searched = pattern_searched_move if patterns else searched_move
+        square, _ = searched(
+            board.discs[player_mark], board.discs[opponent_of(player_mark)]
+        )
+
+    return square
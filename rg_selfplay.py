@@ -0,0 +1,194 @@
+"""Self-play training data for fitting reversegam evaluation weights.
+
+The registered strategies play each other, every ordered pair in turn, after
+a few random opening moves so that deterministic strategies still play
+different games. Every position before a move becomes a sample: the tiles of
+X and O as uint64 bitboards, the side to move (0 for X, 1 for O) and the
+final tile difference of the game for X.
+
+Samples go into shards of a fixed number of samples, each a NumPy .npz file
+with the arrays x, o, side and result, written by the worker process that
+played its games. A worker only holds the shard it is filling, so a run can
+produce far more samples than fit in memory. The games of shard n use seeds
+from seed + n * SHARD_SEED_STRIDE, so every shard can be made again on its
+own. manifest.json in the output directory lists the settings and every
+finished shard, and is rewritten after each one, so an interrupted run
+continues with the shards it is missing.
+
+Needs NumPy, which the rest of the games do not use."""
+
+import json
+import os
+from array import array
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from rg_engine import starting_board
+from rg_runner import play_full_game
+
+VERSION = 1
+MANIFEST = "manifest.json"
+SHARD_SAMPLES = 1_000_000
+# random moves at the start of every game
+OPENING_PLIES = 8
+# seeds of different shards are this far apart, more than a shard's games
+SHARD_SEED_STRIDE = 1_000_000
+
+
+def matchups(strategies: list[str]) -> list[tuple[str, str]]:
+    """returns every ordered (X, O) pair of the strategies, including each
+    strategy against itself"""
+
+    return [(x_ai, o_ai) for x_ai in strategies for o_ai in strategies]
+
+
+def play_shard(
+    directory: str,
+    index: int,
+    strategies: list[str],
+    seed: int,
+    samples: int,
+    opening_plies: int,
+    compressed: bool,
+) -> dict:
+    """plays games until shard index holds samples positions, writes it to
+    directory and returns its manifest entry"""
+
+    columns = {
+        "x": array("Q"),
+        "o": array("Q"),
+        "side": array("B"),
+        "result": array("b"),
+    }
+    pairs = matchups(strategies)
+    first_seed = seed + index * SHARD_SEED_STRIDE
+
+    games = 0
+    while len(columns["side"]) < samples:
+        x_ai, o_ai = pairs[games % len(pairs)]
+        final = play_full_game(
+            x_ai, o_ai, first_seed + games, opening_plies=opening_plies
+        )
+        games += 1
+        result = final.counts["X"] - final.counts["O"]
+
+        # replay the game to get the position before every move
+        board = starting_board()
+        for mark, square, _, _, _ in final.stack[: samples - len(columns["side"])]:
+            columns["x"].append(board.discs["X"])
+            columns["o"].append(board.discs["O"])
+            columns["side"].append(0 if mark == "X" else 1)
+            columns["result"].append(result)
+            board.apply(mark, square)
+
+    name = f"shard-{index:05d}.npz"
+    write_shard(os.path.join(directory, name), columns, compressed)
+
+    return {"index": index, "file": name, "samples": samples, "games": games}
+
+
+def write_shard(path: str, columns: dict[str, array], compressed: bool) -> None:
+    """writes the columns as NumPy arrays to path, replacing it atomically"""
+
+    arrays = {
+        name: np.frombuffer(column, dtype=column.typecode)
+        for name, column in columns.items()
+    }
+    save = np.savez_compressed if compressed else np.savez
+
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as shard_file:
+        save(
+            shard_file,
+            x=arrays["x"],
+            o=arrays["o"],
+            side=arrays["side"],
+            result=arrays["result"],
+        )
+        shard_file.flush()
+        os.fsync(shard_file.fileno())
+    os.replace(temporary_path, path)
+
+
+def load_manifest(directory: str, settings: dict) -> dict:
+    """returns the manifest in directory, or a new one for the settings.
+    an existing manifest must have been made with the same settings"""
+
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {"version": VERSION, "settings": settings, "shards": []}
+
+    with open(path) as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest.get("version") != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} manifest")
+    if manifest["settings"] != settings:
+        raise ValueError(f"{path} was made with other settings")
+
+    return manifest
+
+
+def save_manifest(directory: str, manifest: dict) -> None:
+    """writes the manifest to directory atomically"""
+
+    path = os.path.join(directory, MANIFEST)
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+        manifest_file.flush()
+        os.fsync(manifest_file.fileno())
+    os.replace(temporary_path, path)
+
+
+def run_selfplay(
+    directory: str,
+    strategies: list[str],
+    shards: int,
+    seed: int = 0,
+    shard_samples: int = SHARD_SAMPLES,
+    opening_plies: int = OPENING_PLIES,
+    compressed: bool = True,
+    workers: int | None = None,
+    progress: Callable[[dict], None] | None = None,
+) -> dict:
+    """makes shards shards of self-play samples in directory, skipping the
+    ones its manifest lists already, and returns the manifest. progress is
+    called with the manifest entry of every finished shard"""
+
+    os.makedirs(directory, exist_ok=True)
+    settings = {
+        "strategies": strategies,
+        "seed": seed,
+        "shard_samples": shard_samples,
+        "opening_plies": opening_plies,
+        "compressed": compressed,
+    }
+    manifest = load_manifest(directory, settings)
+    save_manifest(directory, manifest)
+    done = {shard["index"] for shard in manifest["shards"]}
+    missing = [index for index in range(shards) if index not in done]
+    arguments = (strategies, seed, shard_samples, opening_plies, compressed)
+
+    def finish(shard: dict) -> None:
+        manifest["shards"].append(shard)
+        manifest["shards"].sort(key=lambda entry: entry["index"])
+        save_manifest(directory, manifest)
+        if progress is not None:
+            progress(shard)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(missing) < 2:
+        for index in missing:
+            finish(play_shard(directory, index, *arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(play_shard, directory, index, *arguments)
+                for index in missing
+            ]
+            for future in as_completed(futures):
+                finish(future.result())
+
+    return manifest
@@ -0,0 +1,144 @@
+"""Statistics over reversegam game records.
+
+SimulationStats takes the games of one or more record files one at a time
+and keeps only running totals: per pairing of strategies the wins, ties and
+summed tile margin, how often every square was played and how many games
+lasted each number of moves. Its memory stays the same however many games
+are read, so logs larger than memory are processed in a single pass."""
+
+from collections.abc import Iterable
+
+from rg_engine import COLUMNS
+from rg_records import GameRecord, read_records
+
+# a game has at most 60 moves, one per empty square of the starting board
+MAX_MOVES = 60
+
+
+class PairingStats:
+    """running totals of the games ai1 played as X against ai2 as O"""
+
+    def __init__(self):
+        self.games = 0
+        self.ai1_wins = 0
+        self.ai2_wins = 0
+        self.ties = 0
+        # sum of ai1 tiles minus ai2 tiles at the end of the games
+        self.margin = 0
+
+    def add(self, record: GameRecord) -> None:
+        """counts one game"""
+
+        self.games += 1
+        self.margin += record.x_score - record.o_score
+        if record.x_score > record.o_score:
+            self.ai1_wins += 1
+        elif record.x_score < record.o_score:
+            self.ai2_wins += 1
+        else:
+            self.ties += 1
+
+    def win_rates(self) -> tuple[float, float, float]:
+        """returns the share of ai1 wins, ai2 wins and ties in percent"""
+
+        if not self.games:
+            return (0.0, 0.0, 0.0)
+
+        return (
+            100 * self.ai1_wins / self.games,
+            100 * self.ai2_wins / self.games,
+            100 * self.ties / self.games,
+        )
+
+    def average_margin(self) -> float:
+        """returns how many tiles ai1 ended ahead of ai2 on average"""
+
+        return self.margin / self.games if self.games else 0.0
+
+
+class SimulationStats:
+    """running totals over any number of games"""
+
+    def __init__(self):
+        self.games = 0
+        # (ai1, ai2) -> totals of their games
+        self.pairings: dict[tuple[str, str], PairingStats] = {}
+        # times each square was played
+        self.heatmap = [0] * 64
+        # games by number of moves
+        self.lengths = [0] * (MAX_MOVES + 1)
+
+    def add(self, record: GameRecord) -> None:
+        """counts one game"""
+
+        self.games += 1
+        pairing = (record.ai1, record.ai2)
+        if pairing not in self.pairings:
+            self.pairings[pairing] = PairingStats()
+        self.pairings[pairing].add(record)
+
+        for square in record.moves:
+            self.heatmap[square] += 1
+        self.lengths[len(record.moves)] += 1
+
+    def update(self, records: Iterable[GameRecord]) -> "SimulationStats":
+        """counts every game of records and returns the stats"""
+
+        for record in records:
+            self.add(record)
+
+        return self
+
+    def average_length(self) -> float:
+        """returns the average number of moves per game"""
+
+        if not self.games:
+            return 0.0
+
+        return sum(moves * games for moves, games in enumerate(self.lengths)) / (
+            self.games
+        )
+
+    def report(self) -> str:
+        """returns the stats as text"""
+
+        lines = [f"{self.games} games"]
+
+        lines.append("")
+        lines.append("X  O  games     X wins  O wins  ties    margin")
+        for (ai1, ai2), pairing in sorted(self.pairings.items()):
+            ai1_rate, ai2_rate, tie_rate = pairing.win_rates()
+            lines.append(
+                f"{ai1}  {ai2}  {pairing.games:<8}  {ai1_rate:5.1f}%  "
+                f"{ai2_rate:5.1f}%  {tie_rate:5.1f}%  {pairing.average_margin():+.2f}"
+            )
+
+        # share of all moves played on each square, laid out like the board
+        total_moves = sum(self.heatmap) or 1
+        lines.append("")
+        lines.append("Moves per square (%)")
+        lines.append("   " + "".join(f"{column:>6}" for column in COLUMNS))
+        for row in range(8):
+            shares = self.heatmap[row * 8 : row * 8 + 8]
+            lines.append(
+                f"{row + 1:>3}"
+                + "".join(f"{100 * share / total_moves:6.2f}" for share in shares)
+            )
+
+        lines.append("")
+        lines.append(f"Game length (average {self.average_length():.1f} moves)")
+        for moves, games in enumerate(self.lengths):
+            if games:
+                lines.append(f"{moves:>3} moves: {games}")
+
+        return "\n".join(lines)
+
+
+def collect_stats(paths: Iterable[str]) -> SimulationStats:
+    """reads the record files one game at a time and returns their stats"""
+
+    stats = SimulationStats()
+    for path in paths:
+        stats.update(read_records(path))
+
+    return stats
@@ -0,0 +1,330 @@
+"""Computer strategies the rg-sim simulators choose from.
+
+Every strategy is registered under the identifier the menus show, with its
+name, a description and a cost class saying how much work a move takes:
+
+- cheap: looks at the allowed moves only
+- greedy: tries every allowed move once and compares the scores
+- search: looks several moves ahead
+
+A strategy gets the position as Candidates and returns the coordinates it
+plays. The scores after each allowed move are worked out the first time a
+strategy asks for them and shared by everything that asks again, so no
+strategy runs its own scoring loop. choose_moves takes many positions at once
+and hands them to the strategy's batch version when it has one, such as the
+NumPy lockstep moves of rg_batch for the greedy strategies."""
+
+import functools
+import random
+from collections.abc import Callable
+from textwrap import wrap
+from typing import NamedTuple
+
+from rg_engine import (
+    Board,
+    get_scores,
+    opponent_of,
+    to_coordinates,
+    to_square,
+    valid_move,
+)
+from rg_mcts import mcts_square
+from rg_patterns import Patterns
+from rg_search import alpha_beta_square
+
+COST_CLASSES = ("cheap", "greedy", "search")
+
+
+class Candidates:
+    """the allowed moves of a position and, on first use, the score the
+    player would have after each of them"""
+
+    def __init__(self, player_mark: str, allowed_moves: list[str], board: Board):
+        self.player_mark = player_mark
+        self.allowed_moves = allowed_moves
+        self.board = board
+
+    @functools.cached_property
+    def scores(self) -> dict[str, int]:
+        """returns the player's score after each allowed move"""
+
+        opponent_mark = opponent_of(self.player_mark)
+
+        scores = {}
+        for coordinates in self.allowed_moves:
+            # try the valid move on the playing board
+            valid_move(self.player_mark, coordinates, self.board)
+            # get the score of the move and store them
+            scores[coordinates] = get_scores(
+                self.player_mark, opponent_mark, self.board
+            )[0]
+            # take the move back before trying the next one
+            self.board.undo()
+
+        return scores
+
+
+class Strategy(NamedTuple):
+    """a registered strategy"""
+
+    identifier: str
+    name: str
+    description: str
+    # one of COST_CLASSES
+    cost: str
+    choose: Callable[[Candidates], str]
+    # chooses the moves of many positions at once, if the strategy can
+    choose_batch: Callable[[list[Candidates]], list[str]] | None = None
+
+
+# identifier -> strategy, in the order the menus list them
+STRATEGIES: dict[str, Strategy] = {}
+
+
+def register(
+    identifier: str,
+    description: str,
+    cost: str,
+    choose_batch: Callable[[list[Candidates]], list[str]] | None = None,
+):
+    """registers the decorated function as the strategy's choice of move,
+    under the function's name"""
+
+    if identifier in STRATEGIES:
+        raise ValueError(f"algorithm {identifier} is already registered")
+    if cost not in COST_CLASSES:
+        raise ValueError(f"unknown cost class: {cost}")
+
+    def decorator(choose: Callable[[Candidates], str]) -> Callable[[Candidates], str]:
+        STRATEGIES[identifier] = Strategy(
+            identifier, choose.__name__, description, cost, choose, choose_batch
+        )
+        return choose
+
+    return decorator
+
+
+def lockstep_batch(identifier: str) -> Callable[[list[Candidates]], list[str]]:
+    """returns a batch version of the strategy that picks the moves of all
+    positions at once with rg_batch, or one position at a time without NumPy.
+    rg_batch chooses among all legal moves of a board, so positions whose
+    allowed moves are not exactly those are left to the strategy itself"""
+
+    def choose_batch(positions: list[Candidates]) -> list[str]:
+        choose = STRATEGIES[identifier].choose
+        try:
+            # imported here so the strategies work without NumPy installed
+            import numpy as np
+
+            from rg_batch import chosen_moves, legal_moves
+        except ImportError:
+            return [choose(position) for position in positions]
+
+        player = np.array(
+            [position.board.discs[position.player_mark] for position in positions],
+            dtype=np.uint64,
+        )
+        opponent = np.array(
+            [
+                position.board.discs[opponent_of(position.player_mark)]
+                for position in positions
+            ],
+            dtype=np.uint64,
+        )
+        allowed = np.array(
+            [
+                sum(
+                    1 << to_square(coordinates)
+                    for coordinates in position.allowed_moves
+                )
+                for position in positions
+            ],
+            dtype=np.uint64,
+        )
+        legal = legal_moves(player, opponent)
+        squares = chosen_moves(identifier, player, opponent, legal, None)
+
+        return [
+            to_coordinates(int(square)) if batched else choose(position)
+            for position, square, batched in zip(
+                positions, squares, (legal == allowed) & (allowed != 0)
+            )
+        ]
+
+    return choose_batch
+
+
+@register(
+    "1",
+    "applies corner moves otherwise retrieves coordinates with highest score "
+    "and plays with it",
+    "greedy",
+    lockstep_batch("1"),
+)
+def corner_first_computer(candidates: Candidates) -> str:
+    """returns a corner move otherwise the coordinates with highest score"""
+
+    corners = ["a1", "h1", "a8", "h8"]
+
+    for corner in corners:
+        if corner in candidates.allowed_moves:
+            return corner
+
+    # if none of the corners are in allowed_moves use the best score
+    return best_scoring_computer(candidates)
+
+
+@register(
+    "2",
+    "applies side moves otherwise retrieves coordinates with highest score "
+    "and plays with it",
+    "greedy",
+    lockstep_batch("2"),
+)
+def side_first_computer(candidates: Candidates) -> str:
+    """returns a side move otherwise the coordinates with highest score"""
+
+    for coordinate in candidates.allowed_moves:
+        # side coordinate has to have "a" or "1" or "h" or "7"
+        if any(side_indicator in coordinate for side_indicator in ["a", "1", "h", "7"]):
+            return coordinate
+
+    # if none of the sides are in allowed_moves use the best score
+    return best_scoring_computer(candidates)
+
+
+@register(
+    "3",
+    "retrieves coordinates with highest score and plays with it",
+    "greedy",
+    lockstep_batch("3"),
+)
+def best_scoring_computer(candidates: Candidates) -> str:
+    """returns the coordinates with highest score"""
+
+    scores = candidates.scores
+
+    return max(scores, key=lambda x: scores[x], default="")
+
+
+@register(
+    "4",
+    "retrieves coordinates with lowest score and plays with it",
+    "greedy",
+    lockstep_batch("4"),
+)
+def worst_scoring_computer(candidates: Candidates) -> str:
+    """returns the coordinates with lowest score"""
+
+    scores = candidates.scores
+
+    return min(scores, key=lambda x: scores[x], default="")
+
+
+@register("5", "retrieves random coordinates and plays with it", "cheap")
+def random_move_computer(candidates: Candidates) -> str:
+    """returns random coordinates"""
+
+    return random.choice(candidates.allowed_moves)
+
+
+@register("6", "searches a few moves ahead and plays the best move found", "search")
+def alpha_beta_computer(candidates: Candidates) -> str:
+    """returns the best move of a few moves deep alpha-beta search"""
+
+    return to_coordinates(alpha_beta_square(candidates.board, candidates.player_mark))
+
+
+@register(
+    "7",
+    "plays random games through a search tree and plays the most explored move",
+    "search",
+)
+def mcts_computer(candidates: Candidates) -> str:
+    """returns the most explored move of a Monte Carlo tree search"""
+
+    return to_coordinates(mcts_square(candidates.board, candidates.player_mark))
+
+
+@register(
+    "8",
+    "retrieves coordinates with the best value in pattern tables of edges, "
+    "corners and lines and plays with it",
+    "greedy",
+)
+def pattern_scoring_computer(candidates: Candidates) -> str:
+    """returns the coordinates with the best pattern value"""
+
+    board = candidates.board
+    mark = candidates.player_mark
+    patterns = Patterns(board)
+    # the pattern value is for X
+    sign = 1 if mark == "X" else -1
+
+    values = {}
+    for coordinates in candidates.allowed_moves:
+        square = to_square(coordinates)
+        values[coordinates] = sign * patterns.value_after(
+            mark, square, board.flips_for(mark, square)
+        )
+
+    return max(values, key=lambda x: values[x], default="")
+
+
+@register(
+    "9",
+    "searches a few moves ahead, valuing positions with the pattern tables, "
+    "and plays the best move found",
+    "search",
+)
+def pattern_search_computer(candidates: Candidates) -> str:
+    """returns the best move of a few moves deep alpha-beta search that
+    evaluates by pattern value"""
+
+    return to_coordinates(
+        alpha_beta_square(candidates.board, candidates.player_mark, patterns=True)
+    )
+
+
+def strategy(identifier: str) -> Strategy:
+    """returns the registered strategy"""
+
+    if identifier not in STRATEGIES:
+        raise ValueError(f"unknown algorithm: {identifier}")
+
+    return STRATEGIES[identifier]
+
+
+def choose_moves(identifier: str, positions: list[Candidates]) -> list[str]:
+    """returns the coordinates the strategy plays in each position, without
+    playing them"""
+
+    chosen = strategy(identifier)
+    if chosen.choose_batch is not None:
+        return chosen.choose_batch(positions)
+
+    return [chosen.choose(position) for position in positions]
+
+
+def chosen_algorithm(
+    identifier: str, player_mark: str, allowed_moves: list[str], board: Board
+):
+    """lets the strategy choose a move and plays it on the board"""
+
+    coordinates = strategy(identifier).choose(
+        Candidates(player_mark, allowed_moves, board)
+    )
+    valid_move(player_mark, coordinates, board)
+
+
+def strategy_menu() -> str:
+    """returns the numbered list of the strategies the simulators print"""
+
+    lines = []
+    for identifier, registered in STRATEGIES.items():
+        label = f"{identifier}. {registered.name}:"
+        description = wrap(registered.description, 64)
+        lines.append(f"{label:<30}{description[0]}")
+        lines.extend(" " * 30 + line for line in description[1:])
+
+    return "\n".join(lines)
@@ -0,0 +1,142 @@
+"""Board symmetries for reversegam.
+
+The board looks the same after any of its 8 symmetries (rotations by a
+quarter turn and reflections), and so does the starting position, so a
+position and its mirror images have the same value and corresponding best
+moves. canonical picks one representative of the 8 positions, the one with
+the smallest (player, opponent) bitboards, and reports which symmetry leads
+to it so moves can be mapped there and back. symmetric_cache puts an LRU cache
+keyed on that representative in front of an expensive evaluation, so it is
+computed once for all 8 positions."""
+
+import functools
+from collections.abc import Callable
+
+from rg_engine import FULL, zobrist_hash
+
+# masks for swapping neighbouring bits, bit pairs and nibbles inside a byte
+BIT_MASK = 0x5555555555555555
+PAIR_MASK = 0x3333333333333333
+NIBBLE_MASK = 0x0F0F0F0F0F0F0F0F
+# masks for the three delta swaps of a transpose along the a1-h8 diagonal
+TRANSPOSE_MASKS = (
+    (0x0F0F0F0F00000000, 28),
+    (0x3333000033330000, 14),
+    (0x5500550055005500, 7),
+)
+
+
+def flip_vertical(bits: int) -> int:
+    """returns the bitboard with row 1 and row 8 swapped and so on"""
+
+    return int.from_bytes(bits.to_bytes(8, "little"), "big")
+
+
+def mirror_horizontal(bits: int) -> int:
+    """returns the bitboard with column a and column h swapped and so on"""
+
+    bits = ((bits >> 1) & BIT_MASK) | ((bits & BIT_MASK) << 1)
+    bits = ((bits >> 2) & PAIR_MASK) | ((bits & PAIR_MASK) << 2)
+    bits = ((bits >> 4) & NIBBLE_MASK) | ((bits & NIBBLE_MASK) << 4)
+
+    return bits & FULL
+
+
+def transpose(bits: int) -> int:
+    """returns the bitboard reflected along the a1-h8 diagonal"""
+
+    for mask, shift in TRANSPOSE_MASKS:
+        swapped = mask & (bits ^ (bits << shift))
+        bits ^= swapped ^ (swapped >> shift)
+
+    return bits & FULL
+
+
+def transform(bits: int, symmetry: int) -> int:
+    """returns the bitboard under one of the 8 symmetries, numbered by which
+    of transpose (4), flip_vertical (2) and mirror_horizontal (1) it applies
+    in that order"""
+
+    if symmetry & 4:
+        bits = transpose(bits)
+    if symmetry & 2:
+        bits = flip_vertical(bits)
+    if symmetry & 1:
+        bits = mirror_horizontal(bits)
+
+    return bits
+
+
+# where each square goes under each symmetry and where it comes from
+SQUARE_MAPS = tuple(
+    tuple(transform(1 << square, symmetry).bit_length() - 1 for square in range(64))
+    for symmetry in range(8)
+)
+INVERSE_MAPS = tuple(
+    tuple(square_map.index(square) for square in range(64))
+    for square_map in SQUARE_MAPS
+)
+
+
+def canonical(player: int, opponent: int) -> tuple[int, int, int]:
+    """returns the representative player and opponent bitboards of the
+    position and the symmetry that leads to them"""
+
+    best = (player, opponent, 0)
+    for symmetry in range(1, 8):
+        candidate = (
+            transform(player, symmetry),
+            transform(opponent, symmetry),
+            symmetry,
+        )
+        if candidate < best:
+            best = candidate
+
+    return best
+
+
+def to_canonical(square: int, symmetry: int) -> int:
+    """returns where the square goes under the symmetry"""
+
+    return SQUARE_MAPS[symmetry][square]
+
+
+def from_canonical(square: int, symmetry: int) -> int:
+    """returns the square the symmetry moved to square"""
+
+    return INVERSE_MAPS[symmetry][square]
+
+
+def canonical_key(player: int, opponent: int) -> tuple[int, int]:
+    """returns a hash shared by the position and its mirror images, with the
+    player to move counted as X, and the symmetry to the representative"""
+
+    player, opponent, symmetry = canonical(player, opponent)
+
+    return (zobrist_hash({"X": player, "O": opponent}), symmetry)
+
+
+def symmetric_cache(maxsize: int | None = 4096):
+    """caches a function of (player, opponent) that returns (square, value)
+    on the representative position, mapping the square back to each caller's
+    orientation (a square of -1 is passed through)"""
+
+    def decorator(
+        function: Callable[[int, int], tuple[int, int]]
+    ) -> Callable[[int, int], tuple[int, int]]:
+        cached = functools.lru_cache(maxsize)(function)
+
+        @functools.wraps(function)
+        def wrapper(player: int, opponent: int) -> tuple[int, int]:
+            player, opponent, symmetry = canonical(player, opponent)
+            square, value = cached(player, opponent)
+            if square < 0:
+                return (square, value)
+
+            return (from_canonical(square, symmetry), value)
+
+        wrapper.cache_info = cached.cache_info  # type: ignore[attr-defined]
+        wrapper.cache_clear = cached.cache_clear  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator